@@ -0,0 +1,2 @@
+# Offline benchmarks. Run from the repository root, e.g.
+# `python -m benchmarks.bench_parse_data`.
@@ -0,0 +1,104 @@
+"""
+Items/sec of HomeDepotScraper.parse_data on recorded searchModel payloads.
+
+Compares the previous parse path, which validated every product into a
+HomeDepotItem before checking the discount, with the current path that
+pre-filters on the raw pricing dict and only validates the survivors.
+
+    python -m benchmarks.bench_parse_data [payload.json ...] [--items 20000] [--repeat 5]
+"""
+import argparse
+import copy
+import json
+import os
+import time
+from typing import List
+from urllib.parse import urljoin
+
+from model.home_depot import HomeDepotItem
+from model.item import Product
+from scraping.scrapers.home_depot import HomeDepotScraper
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+DEFAULT_PAYLOADS = [os.path.join(FIXTURES_DIR, 'search_model.json')]
+
+
+def load_products(paths: List[str], items: int) -> List[dict]:
+    """Load the products of every payload and repeat them, with unique item ids, up to `items`."""
+    recorded = []
+    for path in paths:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        recorded.extend(data.get('data', {}).get('searchModel', {}).get('products', []))
+    if not recorded:
+        raise SystemExit("No products found in the given payloads.")
+
+    products = []
+    while len(products) < items:
+        item = copy.deepcopy(recorded[len(products) % len(recorded)])
+        item['identifiers']['itemId'] = f"{item['identifiers']['itemId']}-{len(products)}"
+        products.append(item)
+    return products
+
+
+def legacy_parse_data(scraper: HomeDepotScraper, data: List[dict]):
+    """The parse path before the raw pricing pre-filter, kept here as the baseline."""
+    for item_data in data:
+        try:
+            hd_product = HomeDepotItem(**item_data)
+            current_price = hd_product.pricing.value if hd_product.pricing else None
+            original_price = hd_product.pricing.original if hd_product.pricing else None
+            if current_price is None or original_price is None:
+                continue
+            if current_price <= original_price * scraper.required_discount_percentage:
+                product = Product(
+                    id=hd_product.identifiers.itemId,
+                    website=scraper.site,
+                    brand=hd_product.identifiers.brandName,
+                    name=hd_product.identifiers.productLabel,
+                    dollar_off=hd_product.pricing.promotion.dollarOff if hd_product.pricing.promotion else 0,
+                    percentage_off=hd_product.pricing.promotion.percentageOff if hd_product.pricing.promotion else 0,
+                    original_price=original_price,
+                    current_price=current_price,
+                    department=hd_product.info.categoryHierarchy[0] if hd_product.info.categoryHierarchy else None,
+                    url=urljoin(hd_product.website.base_url, hd_product.identifiers.canonicalUrl),
+                    image_url=urljoin(hd_product.website.base_url,
+                                      hd_product.media.images[0].url) if hd_product.media.images else ''
+                )
+                scraper.product_callback(product)
+        except Exception as e:
+            print(f"Error parsing product data: {e}")
+
+
+def measure(parse, products: List[dict], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(products)
+        best = min(best, time.perf_counter() - started)
+    return len(products) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('payloads', nargs='*', default=DEFAULT_PAYLOADS)
+    parser.add_argument('--items', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    products = load_products(args.payloads, args.items)
+    legacy_found, found = [], []
+    legacy_scraper = HomeDepotScraper(proxy_manager=None, product_callback=legacy_found.append)
+    scraper = HomeDepotScraper(proxy_manager=None, product_callback=found.append)
+
+    before = measure(lambda items: legacy_parse_data(legacy_scraper, items), products, args.repeat)
+    after = measure(scraper.parse_data, products, args.repeat)
+
+    print(f"{len(products)} products, {len(found) // args.repeat} passed the discount filter per run")
+    print(f"before (validate all):  {before:12,.0f} items/sec")
+    print(f"after  (pre-filter):    {after:12,.0f} items/sec")
+    print(f"speedup:                {after / before:12.1f}x")
+
+
+if __name__ == '__main__':
+    main()
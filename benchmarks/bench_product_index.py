@@ -0,0 +1,91 @@
+"""
+Duplicate checks against MainScreenModel with 100k products.
+
+Compares the linear scan MainScreenController.is_product_in_model used to do
+over archived and current products with the model's (website, id) index.
+
+    python -m benchmarks.bench_product_index [--products 100000] [--lookups 2000]
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from model.amazon import AmazonItem
+from model.item import Product
+from model.main_screen import MainScreenModel
+from utility.utils import Websites
+
+
+def make_product(index: int, enriched: bool = False) -> Product:
+    return Product(
+        id=str(300000000 + index),
+        website=Websites.HOME_DEPOT,
+        brand="Brand",
+        name=f"Product {index}",
+        original_price=100.0,
+        current_price=30.0,
+        department="Tools",
+        image_url="",
+        url=f"https://www.homedepot.com/p/{300000000 + index}",
+        amazon=AmazonItem(price=45.0, url=f"https://www.amazon.com/dp/{index}") if enriched else None,
+    )
+
+
+def linear_scan(model: MainScreenModel, product: Product) -> bool:
+    """The membership check before the index, kept here as the baseline."""
+    for archived_product in model.archived_products:
+        if archived_product.id == product.id:
+            return True
+    for existing_product in model.products:
+        if existing_product.id == product.id:
+            return True
+    return False
+
+
+def measure(check, model: MainScreenModel, lookups) -> float:
+    started = time.perf_counter()
+    for product in lookups:
+        check(model, product)
+    return (time.perf_counter() - started) / len(lookups)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    # Enriched, since products without an Amazon match are not counted as already in the model
+    products = [make_product(i, enriched=True) for i in range(args.products)]
+    model = MainScreenModel()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for product in products:
+            model.add_product(product)
+        for product in products[:1000]:
+            model.archive_product(product)
+    fill_seconds = time.perf_counter() - started
+
+    # Half the lookups hit existing products, half are new
+    lookups = random.sample(products, args.lookups // 2)
+    lookups += [make_product(args.products + i, enriched=True) for i in range(args.lookups // 2)]
+    random.shuffle(lookups)
+
+    # Both checks must give the same answers for the timings to be comparable
+    sample = lookups[:200]
+    assert [linear_scan(model, p) for p in sample] == [model.contains_product(p) for p in sample], \
+        "linear scan and index disagree"
+
+    scan = measure(linear_scan, model, sample)
+    indexed = measure(lambda m, p: m.contains_product(p), model, lookups)
+
+    print(f"{args.products} products ({len(model.archived_products)} archived), filled in {fill_seconds:.2f}s")
+    print(f"linear scan:  {scan * 1e6:12.1f} us/lookup")
+    print(f"index:        {indexed * 1e6:12.3f} us/lookup")
+    print(f"speedup:      {scan / indexed:12.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+ZIP code validation and coordinate lookup.
+
+Compares uszipcode's SearchEngine, which opens its SQLite database on
+creation and runs a query per lookup, with the preloaded ZipTable: the cost
+of building the table from the database, loading it from its cache file,
+and one lookup with each.
+
+Without the uszipcode database (it is downloaded on first use) a synthetic
+table of 42k ZIP codes is built in memory and only the ZipTable numbers
+are reported.
+
+    python -m benchmarks.bench_zip_table [--lookups 20000] [--db-file PATH] [--synthetic]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from utility.zip_table import ZipTable
+
+
+def synthetic_rows(count: int = 42000):
+    for zip_code in random.sample(range(501, 99951), count):
+        yield f"{zip_code:05d}", random.uniform(18, 71), random.uniform(-170, -65)
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def per_lookup(lookup, zip_codes) -> float:
+    started = time.perf_counter()
+    for zip_code in zip_codes:
+        lookup(zip_code)
+    return (time.perf_counter() - started) / len(zip_codes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--db-file', help="uszipcode simple_db.sqlite, defaults to ~/.uszipcode")
+    parser.add_argument('--synthetic', action='store_true', help="skip the uszipcode database")
+    args = parser.parse_args()
+
+    search_engine = None
+    if args.synthetic:
+        table, build_seconds = timed(lambda: ZipTable.from_rows(synthetic_rows()))
+    else:
+        from uszipcode import SearchEngine
+
+        _, engine_seconds = timed(lambda: SearchEngine(db_file_path=args.db_file).close())
+        search_engine = SearchEngine(db_file_path=args.db_file)
+        table, build_seconds = timed(lambda: ZipTable.from_uszipcode(SearchEngine(db_file_path=args.db_file)))
+        print(f"SearchEngine():         {engine_seconds * 1e3:10.1f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'zip_table.bin')
+        table.save(path)
+        _, load_seconds = timed(lambda: ZipTable.load(path))
+        size = os.path.getsize(path)
+
+    known = [f"{index:05d}" for index in range(100000) if table.valid[index]]
+    # Half the lookups are known ZIP codes, half are random five digit strings
+    zip_codes = random.choices(known, k=args.lookups // 2)
+    zip_codes += [f"{random.randrange(100000):05d}" for _ in range(args.lookups // 2)]
+    random.shuffle(zip_codes)
+
+    print(f"{len(table)} ZIP codes, cache file {size / 1024:.0f} KiB")
+    print(f"build from rows:        {build_seconds * 1e3:10.1f} ms")
+    print(f"load from cache file:   {load_seconds * 1e3:10.1f} ms")
+    indexed = per_lookup(table.lookup, zip_codes)
+    print(f"ZipTable.lookup:        {indexed * 1e6:10.3f} us/lookup")
+    if search_engine:
+        engine = per_lookup(search_engine.by_zipcode, zip_codes[:2000])
+        print(f"SearchEngine.by_zipcode:{engine * 1e6:10.1f} us/lookup ({engine / indexed:.0f}x)")
+        search_engine.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Offline benchmark suite for parsing, filtering and model operations.
+
+Every operation runs on recorded searchModel fixtures or synthetic product
+sets of each requested size and reports throughput, per-call latency
+percentiles and peak traced memory. Results can be saved as a baseline and
+later runs compared against it; a run exits with status 1 when an operation
+loses more than --threshold of its throughput or its p95 latency grows by
+more than that.
+
+    python -m benchmarks.suite [--sizes 1000 10000 100000] [--only parse_data ...]
+                               [--save-baseline] [--compare] [--baseline PATH] [--threshold 0.25]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.bench_parse_data import DEFAULT_PAYLOADS, load_products
+from benchmarks.bench_product_index import make_product
+from model.home_depot import HomeDepotItem
+from model.main_screen import MainScreenModel
+from scraping.scrapers.home_depot import HomeDepotScraper
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines.json')
+PAGE_SIZE = 24  # Products per searchModel response
+
+
+class Operation:
+    """
+    A benchmarked operation. `setup(size)` builds its input and returns the list
+    of calls to time; each call processes `items_per_call` items.
+    """
+
+    def __init__(self, name: str, setup: Callable[[int], List[Callable[[], None]]], items_per_call: int = 1,
+                 max_size: Optional[int] = None):
+        self.name = name
+        self.setup = setup
+        self.items_per_call = items_per_call
+        self.max_size = max_size
+
+
+def validate_items(size: int):
+    products = load_products(DEFAULT_PAYLOADS, size)
+    return [lambda item=item: HomeDepotItem(**item) for item in products]
+
+
+def parse_pages(size: int):
+    products = load_products(DEFAULT_PAYLOADS, size)
+    scraper = HomeDepotScraper(proxy_manager=None, product_callback=lambda product: None)
+    pages = [products[start:start + PAGE_SIZE] for start in range(0, len(products), PAGE_SIZE)]
+    return [lambda page=page: scraper.parse_data(page) for page in pages]
+
+
+def create_products(size: int):
+    return [lambda index=index: make_product(index) for index in range(size)]
+
+
+def add_products(size: int):
+    model = MainScreenModel()
+    products = [make_product(index) for index in range(size)]
+    return [lambda product=product: model.add_product(product) for product in products]
+
+
+def build_product_list(size: int):
+    # The view needs Kivy; without it this operation is skipped
+    from view.main_screen.main_screen import MainScreenView
+
+    model = SimpleNamespace(products=[make_product(index) for index in range(size)])
+    view = SimpleNamespace(model=model, ids=SimpleNamespace(product_list=SimpleNamespace(data=[])))
+    return [lambda: MainScreenView.update_product_list(view)]
+
+
+OPERATIONS = [
+    Operation('home_depot_item_validate', validate_items),
+    Operation('parse_data', parse_pages, items_per_call=PAGE_SIZE),
+    Operation('product_create', create_products),
+    Operation('model_add_product', add_products),
+    Operation('update_product_list', build_product_list, max_size=10000),
+]
+
+
+def run_operation(operation: Operation, size: int) -> dict:
+    # Time without tracemalloc, which slows allocations down
+    with contextlib.redirect_stdout(io.StringIO()):
+        calls = operation.setup(size)
+        latencies = []
+        started = time.perf_counter()
+        for call in calls:
+            call_started = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - call_started)
+        elapsed = time.perf_counter() - started
+
+        # Peak memory of a second, traced run on fresh input
+        calls = operation.setup(size)
+        tracemalloc.start()
+        for call in calls:
+            call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    items = len(calls) * operation.items_per_call
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'items': items,
+        'throughput': items / elapsed if elapsed else 0.0,
+        'p50_us': quantiles[49] * 1e6,
+        'p95_us': quantiles[94] * 1e6,
+        'p99_us': quantiles[98] * 1e6,
+        'peak_kib': peak / 1024,
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        if result['throughput'] < previous['throughput'] * (1 - threshold):
+            regressions.append(f"{key}: throughput {previous['throughput']:,.0f} -> "
+                               f"{result['throughput']:,.0f} items/s")
+        if result['p95_us'] > previous['p95_us'] * (1 + threshold):
+            regressions.append(f"{key}: p95 {previous['p95_us']:,.1f} -> {result['p95_us']:,.1f} us")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--only', nargs='+', choices=[operation.name for operation in OPERATIONS])
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline")
+    parser.add_argument('--compare', action='store_true', help="compare this run with the baseline")
+    parser.add_argument('--threshold', type=float, default=0.25)
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f).get('results', {})
+
+    print(f"{'operation':<28}{'size':>8}{'items/s':>14}{'p50 us':>11}{'p95 us':>11}{'p99 us':>11}"
+          f"{'peak KiB':>11}{'vs base':>9}")
+    results = {}
+    for operation in OPERATIONS:
+        if args.only and operation.name not in args.only:
+            continue
+        for size in args.sizes:
+            if operation.max_size and size > operation.max_size:
+                continue
+            key = f"{operation.name}[{size}]"
+            try:
+                result = run_operation(operation, size)
+            except ImportError as e:
+                print(f"{operation.name:<28}{size:>8}  skipped: {e}")
+                break
+            results[key] = result
+            previous = baseline.get(key)
+            change = f"{result['throughput'] / previous['throughput'] - 1:+.0%}" if previous else ''
+            print(f"{operation.name:<28}{size:>8}{result['throughput']:>14,.0f}{result['p50_us']:>11,.1f}"
+                  f"{result['p95_us']:>11,.1f}{result['p99_us']:>11,.1f}{result['peak_kib']:>11,.0f}{change:>9}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.platform(),
+                'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'results': {**baseline, **results},
+            }, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,20 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 
+    # OpenAI-compatible endpoint, overridable to point at a local mock server
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+
+    # Port for the Prometheus metrics endpoint, 0 disables it
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+    # Worker processes the Home Depot crawl is split across, each running its own browsers
+    SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", "1"))
+
+    # HAR mode for every scraper: "" (live), "record" or "replay", and where the archives live
+    HAR_MODE = os.getenv("HAR_MODE", "")
+    HAR_DIR = os.getenv("HAR_DIR", "har")
+    HAR_REPLAY_HUMANIZATION = os.getenv("HAR_REPLAY_HUMANIZATION", "off")
+
     # Search engine identifier (e.g., Google CSE)
     SEARCH_ENGINE = os.getenv("SEARCH_ENGINE", "")
 
@@ -0,0 +1,149 @@
+import asyncio
+import atexit
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from model.item import Product
+from scraping.browser_pool import BrowserPool
+from scraping.proxies.proxies import ProxyManager
+from scraping.scrapers.amazon import AmazonScraper
+from utility.metrics import metrics
+from utility.utils import Websites, NoProxyAvailable
+
+
+class AmazonEnrichmentService:
+    """
+    Long-lived Amazon enrichment running on its own thread and event loop.
+
+    Products are handed over with `submit()` from any thread and consumed by
+    `workers` coroutines from a bounded asyncio queue. The workers share one
+    pooled browser and open each item's page on a context behind a healthy
+    Amazon proxy, picked only once the item needs a page (cache hits and
+    items with no search result never wait for one). When the queue is full, `submit()` blocks the calling thread,
+    which slows the Home Depot scraper down to the rate enrichment can keep
+    up with.
+    """
+    no_proxy_wait: float = 60.0  # Wait when no proxy is healthy and none is cooling down
+
+    def __init__(self, proxy_manager: ProxyManager,
+                 process_product: Callable[..., Awaitable[None]],
+                 workers: int = 3, max_queue_size: int = 50):
+        self.proxy_manager = proxy_manager
+        self.process_product = process_product
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.browser_pool: Optional[BrowserPool] = None
+        self._ready = threading.Event()
+        self._stopping: Optional[asyncio.Event] = None
+        self._drain = False
+        self._start_lock = threading.Lock()
+
+        self.processed = 0
+        self.started_at = 0.0
+        metrics.register_gauge('amazon_queue_depth', lambda: self.queue_depth)
+        atexit.register(self.stop)
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self.thread and self.thread.is_alive())
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize() if self.queue else 0
+
+    def start(self):
+        with self._start_lock:
+            if self.is_running:
+                return
+            self._ready.clear()
+            self.thread = threading.Thread(target=self._run_loop, name='amazon-enrichment', daemon=True)
+            self.thread.start()
+        self._ready.wait()
+
+    def submit(self, product: Product):
+        """Queue a product for enrichment, blocking while the queue is full."""
+        self.start()
+        if threading.current_thread() is self.thread:
+            self.queue.put_nowait(product)
+            return
+        asyncio.run_coroutine_threadsafe(self.queue.put(product), self.loop).result()
+
+    def stop(self, timeout: float = 30, drain: bool = False):
+        """
+        Stop the workers and close the pooled browsers. With `drain`, the products
+        already queued are enriched first and the call returns right away.
+        """
+        if not self.is_running:
+            return
+        self._drain = drain
+        self.loop.call_soon_threadsafe(self._stopping.set)
+        if not drain:
+            self.thread.join(timeout)
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._serve())
+        finally:
+            self.loop.close()
+
+    async def _serve(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._stopping = asyncio.Event()
+        self._drain = False
+        self.browser_pool = BrowserPool(max_contexts_per_browser=self.workers, name='amazon_enrichment',
+                                        per_context_proxy=True)
+        self.started_at = time.monotonic()
+        self._ready.set()
+
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        await self._stopping.wait()
+        if self._drain:
+            await self.queue.join()
+
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await self.browser_pool.close()
+        print(f"Amazon enrichment stopped: {self.get_metrics()}")
+
+    async def next_proxy(self):
+        """A healthy Amazon proxy for the next item, waiting out cooldowns rather than going direct."""
+        while True:
+            try:
+                return self.proxy_manager.get_random_proxy(Websites.AMAZON)
+            except NoProxyAvailable as e:
+                delay = self.proxy_manager.seconds_until_available(Websites.AMAZON)
+                delay = self.no_proxy_wait if delay is None else max(1.0, delay)
+                print(f"{e} Waiting {delay:.0f}s before enriching the next item.")
+                await asyncio.sleep(delay)
+
+    async def _worker(self):
+        scraper = AmazonScraper(proxy_manager=self.proxy_manager)
+        while True:
+            product = await self.queue.get()
+            try:
+                with metrics.timer('amazon_enrichment'):
+                    await self.process_product(product, scraper, browser_pool=self.browser_pool,
+                                               proxy_factory=self.next_proxy)
+            except Exception as e:
+                print(f"Error enriching {product.search_query}: {e}")
+            finally:
+                self.processed += 1
+                self.queue.task_done()
+            print(f'Completed Item, {self.queue.qsize()} remaining')
+
+    def get_metrics(self) -> dict:
+        minutes = (time.monotonic() - self.started_at) / 60 if self.started_at else 0.0
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'processed': self.processed,
+            'items_per_minute': self.processed / minutes if minutes else 0.0,
+        }
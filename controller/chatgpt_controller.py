@@ -1,11 +1,15 @@
+import asyncio
 import json
+import random
+import time
+from typing import Optional
 
-import requests
 import tiktoken
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, InternalServerError, RateLimitError
 
 from config.config import Config
+from utility.metrics import metrics
 
 # Load environment variables from the .env file
 load_dotenv()
@@ -19,9 +23,27 @@ def count_tokens(prompt):
 
 class ChatGPTController:
     api_key = Config.OPENAI_API_KEY
+    base_url = Config.OPENAI_BASE_URL
+    model = "gpt-4o"
+
+    max_concurrency: int = 4
+    max_retries: int = 5
+    backoff_base: float = 1.0
+    backoff_max: float = 30.0
+    request_timeout: float = 60.0
 
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        # Retries are handled here so the backoff is jittered and shared with the semaphore
+        self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0,
+                                  timeout=self.request_timeout)
+        self.semaphore: Optional[asyncio.Semaphore] = None
+
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
 
     async def get_product_info(self, search_query, base64_image):
         prompt = f"""
@@ -34,45 +56,35 @@ class ChatGPTController:
         }}
         """
 
-        payload = {
-            "model": "gpt-4o",
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": prompt,
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            }
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": prompt,
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/jpeg;base64,{base64_image}"
                         }
-                    ]
-                }
-            ]
-        }
-
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-
-        response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
+                    }
+                ]
+            }
+        ]
 
-        # Check if the response is valid
-        if response.status_code != 200:
-            print(f"Error: Received response with status code {response.status_code}")
+        response = await self.create_completion(messages)
+        if response is None:
             return None
 
         try:
-            response_json = response.json()
-
             # Extracting the first choice and its message content
-            if response_json.get('choices'):
-                match_info = response_json['choices'][0]['message']['content']
+            if response.choices:
+                match_info = response.choices[0].message.content
+                if match_info is None:
+                    print("Error: The response has no message content.")
+                    return None
                 # Parse the JSON string to a dictionary
                 match_info_dict = json.loads(match_info.strip('```json\n'))
 
@@ -83,6 +95,61 @@ class ChatGPTController:
                     print("Error: Missing expected keys in the response JSON.")
                     return None
 
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
+        except (json.JSONDecodeError, KeyError, ValueError, TypeError) as e:
             print(f"Error parsing response JSON: {e}")
             return None
+
+    async def create_completion(self, messages):
+        """
+        Send a chat completion through the pooled async client. At most
+        `max_concurrency` calls are in flight; 429, 5xx and connection errors are
+        retried with jittered exponential backoff.
+        """
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                started = time.perf_counter()
+                try:
+                    response = await self.client.chat.completions.create(model=self.model, messages=messages)
+                    self.record_latency(time.perf_counter() - started)
+                    return response
+                except (RateLimitError, InternalServerError, APIConnectionError) as e:
+                    error = e
+                except APIStatusError as e:
+                    if e.status_code < 500:
+                        print(f"Error: Received response with status code {e.status_code}")
+                        self.failures += 1
+                        return None
+                    error = e
+
+                if attempt == self.max_retries:
+                    break
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                print(f"OpenAI request failed ({error}), retrying in {delay:.1f}s "
+                      f"(attempt {attempt + 1} of {self.max_retries})")
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+        print(f"OpenAI request failed after {self.max_retries} retries.")
+        self.failures += 1
+        return None
+
+    def record_latency(self, latency: float):
+        metrics.observe('stage_seconds', latency, stage='chatgpt')
+        self.calls += 1
+        self.last_latency = latency
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        print(f"OpenAI call took {latency:.2f}s")
+
+    def get_metrics(self) -> dict:
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'retries': self.retries,
+            'avg_latency': self.total_latency / self.calls if self.calls else 0.0,
+            'max_latency': self.max_latency,
+            'last_latency': self.last_latency,
+        }
@@ -1,55 +1,94 @@
 import asyncio
+import re
 import threading
-from collections import deque
-
-from uszipcode import SearchEngine
+from typing import Optional
 
+from config.config import Config
+from controller.amazon_enrichment import AmazonEnrichmentService
 from controller.chatgpt_controller import ChatGPTController
+from model.amazon import AmazonItem
+from model.deal_store import DealStore
 from model.item import Product
 from model.main_screen import MainScreenModel
+from scraping.orchestrator import ScraperOrchestrator
 from scraping.proxies.proxies import ProxyManager
 from scraping.scrapers.amazon import AmazonScraper
-from scraping.scrapers.home_depot import HomeDepotScraper
+from utility.cache import TTLCache
+from utility.metrics import metrics
+from utility.zip_table import get_zip_table
 from view.main_screen.main_screen import MainScreenView
 
 
 class MainScreenController:
     def __init__(self, model):
         self.model: MainScreenModel = model  # Assuming model.main_screen.MainScreenModel
+        self.deal_store = DealStore()
+        self.model.use_deal_store(self.deal_store)
         self.view = MainScreenView(controller=self, model=self.model)
-        self.search_engine = SearchEngine()
+        self.zip_table = get_zip_table()
         self.chatgpt = ChatGPTController()
+        # Amazon matches by retailer item id and by normalized search query
+        self.amazon_cache = TTLCache(max_size=20000, ttl=3 * 24 * 3600, path='amazon_cache.json')
         self.proxy_manager = ProxyManager(metrics_callback=self.update_proxy_metrics)
-        # self.scraper_manager = ScraperManager()
-        self.product_queue = deque()  # Queue to manage products to be scraped
-        self.scraping = False  # Flag to indicate if scraping is in progress
-
-        self.hd_scraper = HomeDepotScraper(proxy_manager=self.proxy_manager,
-                                           status_callback=self.update_running_status,
-                                           product_callback=self.new_product_found)
-        self.amazon_scraper = AmazonScraper(proxy_manager=self.proxy_manager,
-                                            status_callback=self.update_running_status)
+        self.queued_products = set()  # Keys of products waiting for or being enriched
 
-        self.amazon_thread = None  # Keep track of the Amazon scraper thread
+        # Home Depot is crawled by worker processes that stream products back to new_product_found
+        self.orchestrator = ScraperOrchestrator(proxy_manager=self.proxy_manager,
+                                                product_callback=self.new_product_found,
+                                                status_callback=self.update_running_status)
+        self.amazon_enrichment = AmazonEnrichmentService(proxy_manager=self.proxy_manager,
+                                                         process_product=self.process_amazon_scraper)
+        if Config.METRICS_PORT:
+            metrics.serve(Config.METRICS_PORT)
 
     def get_view(self) -> MainScreenView:
         return self.view
 
     def start_scrapers(self):
-        hd_thread = threading.Thread(target=self.run_hd_scraper)
-        hd_thread.start()
+        print('Running Scrapers')
+        self.orchestrator.start()
         self.model.is_running = True
 
-    def run_hd_scraper(self):
-        print('Running Scrapers')
-        asyncio.run(self.hd_scraper.start())
+    @staticmethod
+    def amazon_cache_keys(product: Product):
+        normalized_query = re.sub(r'[^a-z0-9]+', ' ', product.search_query.lower()).strip()
+        return f"id:{product.website.site_name}:{product.id}", f"query:{normalized_query}"
+
+    def get_cached_amazon_item(self, product: Product) -> Optional[AmazonItem]:
+        id_key, query_key = self.amazon_cache_keys(product)
+        cached = self.amazon_cache.get(id_key) or self.amazon_cache.get(query_key)
+        metrics.inc('amazon_cache_hits_total' if cached else 'amazon_cache_misses_total')
+        return AmazonItem(**cached) if cached else None
 
-    async def process_amazon_scraper(self, product: Product):
+    def cache_amazon_item(self, product: Product, item: Optional[AmazonItem]):
+        if not item or item.price is None:
+            return
+        value = item.dict(exclude={'website'})
+        for key in self.amazon_cache_keys(product):
+            self.amazon_cache.put(key, value)
+        # Rewriting the whole cache is too slow for every item; it is written periodically and at exit
+        self.amazon_cache.save_later()
+
+    async def process_amazon_scraper(self, product: Product, amazon_scraper: AmazonScraper, **run_options):
+        try:
+            await self.enrich_product(product, amazon_scraper, **run_options)
+        finally:
+            self.queued_products.discard(self.model.product_key(product))
+
+    async def enrich_product(self, product: Product, amazon_scraper: AmazonScraper, **run_options):
         print(f'Processing: {product.search_query}')
-        image, item = await self.amazon_scraper.run(product.search_query)
+        cached_item = self.get_cached_amazon_item(product)
+        if cached_item:
+            print(f'Amazon cache hit, metrics: {self.amazon_cache.get_metrics()}')
+            product.amazon = cached_item
+            self.model.add_product(product)
+            return
+
+        image, item = await amazon_scraper.run(product.search_query, **run_options)
         if not image or not item:
             print("Error: Amazon scraper did not return valid image or item.")
             product.amazon = item
+            self.cache_amazon_item(product, item)
             self.model.add_product(product)
             return
 
@@ -73,65 +112,32 @@ class MainScreenController:
                 item.price = None  # Set a default or error value
 
             product.amazon = item
+            self.cache_amazon_item(product, item)
             self.model.add_product(product)
 
-        await self.amazon_scraper.cleanup()
-
-    async def run_amazon_scraper(self):
-        while True:
-            if self.product_queue and not self.scraping:
-                self.scraping = True
-                product = self.product_queue.popleft()
-                await self.process_amazon_scraper(product)
-                self.scraping = False
-                print(f'Completed Item, {len(self.product_queue)} remaining')
-            else:
-                await asyncio.sleep(1)  # Await asyncio.sleep to avoid busy-waiting
-
-            if not self.product_queue:
-                print("Queue is empty, stopping Amazon scraper.")
-                self.amazon_scraper.is_running = False
-                break
-
-    def manage_amazon_scraper(self):
-        if self.product_queue and not self.amazon_scraper.is_running:
-            self.amazon_scraper.is_running = True
-            self.amazon_thread = threading.Thread(target=self.run_amazon_scraper_loop)
-            self.amazon_thread.start()
-        elif not self.product_queue and self.amazon_scraper.is_running:
-            self.amazon_scraper.is_running = False
-            if self.amazon_thread:
-                self.amazon_thread.join()  # Ensure the thread has finished
-
-    def run_amazon_scraper_loop(self):
-        asyncio.run(self.run_amazon_scraper())
-
     def new_product_found(self, product: Product):
-        if not self.is_product_in_model(product):
-            self.product_queue.append(product)
-            print(f'New product added to queue: {len(self.product_queue)}')
-            self.manage_amazon_scraper()
+        # Called on the orchestrator thread; blocks while the enrichment queue is full, which
+        # in turn makes the workers wait once the IPC queue fills up
+        key = self.model.product_key(product)
+        if not self.is_product_in_model(product) and key not in self.queued_products:
+            self.queued_products.add(key)
+            self.amazon_enrichment.submit(product)
+            print(f'New product added to queue: {self.amazon_enrichment.queue_depth}')
 
     def is_product_in_model(self, product: Product) -> bool:
-        # Check if the product is already in the archived products list
-        for archived_product in self.model.archived_products:
-            if archived_product.id == product.id:
-                return True
-
-        # Check if the product is already in the current products list
-        for existing_product in self.model.products:
-            if existing_product.id == product.id:
-                return True
-
-        return False
+        # Skips anything enriched or archived in a previous run and loaded from the deal store;
+        # products whose enrichment failed are skipped until their retry delay has passed
+        return self.model.contains_product(product)
 
     def stop_scraper(self):
         print('Stopping scrapers.')
-        self.hd_scraper.stop()
-        # self.scraper_manager.stop()
-        self.amazon_scraper.is_running = False
-        self.hd_scraper.is_running = False
+        # Workers finish their current tasks; Amazon enrichment drains the products already
+        # queued and then closes its browsers
+        self.orchestrator.stop()
+        self.amazon_enrichment.stop(drain=True)
         self.model.is_running = False
+        self.deal_store.flush()
+        self.amazon_cache.flush()
 
     def update_running_status(self, is_running):
         self.model.running = is_running
@@ -152,13 +158,10 @@ class MainScreenController:
             instance.text = cleaned_text
             return
 
-        # Verify the ZIP code using uszipcode if it is exactly 5 characters
-
-        zipcode = self.search_engine.by_zipcode(cleaned_text)
-
-        if zipcode and zipcode.zipcode:
+        # Verify the ZIP code against the preloaded ZIP table if it is exactly 5 characters
+        if self.zip_table.is_valid(cleaned_text):
             self.model.zip_code = cleaned_text
-            self.hd_scraper.set_zip_code(cleaned_text)
+            self.orchestrator.set_zip_code(cleaned_text)
             instance.error = False  # Clear any existing error
         else:
             print("Invalid ZIP code")
@@ -180,8 +183,11 @@ class MainScreenController:
         refresh_thread = threading.Thread(target=thread_refresh)
         refresh_thread.start()
 
-    def update_proxy_metrics(self, metrics):
-        self.model.proxy_metrics = metrics
+    def update_proxy_metrics(self, proxy_metrics):
+        self.model.proxy_metrics = proxy_metrics
+
+    def get_pipeline_metrics(self) -> dict:
+        return {**metrics.summary(), 'workers': self.orchestrator.get_metrics()}
 
     def alert_user(self):
         pass
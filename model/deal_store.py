@@ -0,0 +1,144 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from model.amazon import AmazonItem
+from model.item import Product
+from utility.utils import Websites
+
+SITES_BY_NAME = {site.site_name: site for site in Websites}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    website TEXT NOT NULL,
+    id TEXT NOT NULL,
+    department TEXT,
+    discount REAL,
+    archived INTEGER NOT NULL DEFAULT 0,
+    product TEXT NOT NULL,
+    amazon TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (website, id)
+);
+CREATE INDEX IF NOT EXISTS idx_products_department ON products (department);
+CREATE INDEX IF NOT EXISTS idx_products_discount ON products (discount);
+"""
+
+UPSERT = """
+INSERT INTO products (website, id, department, discount, archived, product, amazon, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (website, id) DO UPDATE SET
+    department = excluded.department,
+    discount = excluded.discount,
+    archived = excluded.archived,
+    product = excluded.product,
+    amazon = COALESCE(excluded.amazon, products.amazon),
+    updated_at = excluded.updated_at
+"""
+
+
+class DealStore:
+    """
+    SQLite-backed store of discovered deals and their Amazon matches.
+
+    Writes are buffered and upserted in batches inside a single transaction,
+    either once `batch_size` rows are pending or at most `flush_interval`
+    seconds after the first of them was buffered. The database runs in WAL mode so reads
+    are not blocked by a flush in progress.
+    """
+
+    def __init__(self, path: str = 'deals.db', batch_size: int = 50, flush_interval: float = 5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._last_flush = time.monotonic()
+        self._flush_timer: Optional[threading.Timer] = None
+        atexit.register(self.close)
+
+    @staticmethod
+    def key(product: Product) -> Tuple[str, str]:
+        return product.website.site_name, product.id
+
+    @staticmethod
+    def discount(product: Product) -> Optional[float]:
+        if product.original_price and product.current_price is not None:
+            return 1 - product.current_price / product.original_price
+        return None
+
+    @staticmethod
+    def serialize(item) -> str:
+        data = item.dict()
+        data['website'] = item.website.site_name
+        data.pop('amazon', None)  # Stored in its own column
+        return json.dumps(data, default=str)
+
+    @staticmethod
+    def deserialize_product(product_json: str, amazon_json: Optional[str]) -> Product:
+        data = json.loads(product_json)
+        data['website'] = SITES_BY_NAME[data['website']]
+        product = Product(**data)
+        if amazon_json:
+            amazon = json.loads(amazon_json)
+            amazon['website'] = SITES_BY_NAME[amazon['website']]
+            product.amazon = AmazonItem(**amazon)
+        return product
+
+    def upsert(self, product: Product, archived: bool = False):
+        website, product_id = self.key(product)
+        row = (website, product_id, product.department, self.discount(product), int(archived),
+               self.serialize(product), self.serialize(product.amazon) if product.amazon else None, time.time())
+        with self._lock:
+            self._pending.append(row)
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+            if not due and not self._flush_timer:
+                # Flush a partial batch on time even if no further deal arrives
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            rows, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if not rows:
+                return
+            try:
+                with self._connection:
+                    self._connection.executemany(UPSERT, rows)
+            except sqlite3.Error as e:
+                print(f"Error saving {len(rows)} deals to {self.path}: {e}")
+
+    def load(self) -> Iterator[Tuple[Product, bool]]:
+        """Yield every stored product along with whether it is archived."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT product, amazon, archived FROM products ORDER BY updated_at").fetchall()
+        for product_json, amazon_json, archived in rows:
+            try:
+                yield self.deserialize_product(product_json, amazon_json), bool(archived)
+            except Exception as e:
+                print(f"Error loading stored deal: {e}")
+
+    def close(self):
+        try:
+            self.flush()
+            self._connection.close()
+        except sqlite3.ProgrammingError:
+            pass  # Already closed
@@ -1,7 +1,11 @@
-from typing import List
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
 
 from model.base_model import BaseScreenModel
+from model.deal_store import DealStore
 from model.item import Product
+from utility.utils import Websites
 
 
 class MainScreenModel(BaseScreenModel):
@@ -10,12 +14,27 @@ class MainScreenModel(BaseScreenModel):
     This class manages the running state which can control or reflect the state of a process,
     such as web scraping in the background.
     """
+    # A product whose enrichment failed is retried after this delay, doubled after every further failure
+    enrichment_retry_delay: float = 15 * 60
+    max_enrichment_attempts: int = 4
 
     def __init__(self):
         super().__init__()
         self._is_running = False
         self._products: List[Product] = []
         self._archived_products: List[Product] = []
+        # (website, id) of every archived product and every product enriched with an Amazon
+        # match, for constant-time membership checks
+        self._product_keys: Set[Tuple[Websites, str]] = set()
+        # Products shown without an Amazon match because enrichment failed; they are retried
+        # and replaced when scraped again, with a backoff and up to `max_enrichment_attempts` times
+        self._unmatched: Dict[Tuple[Websites, str], Product] = {}
+        self._enrichment_attempts: Dict[Tuple[Websites, str], Tuple[int, float]] = {}  # (attempts, retry at)
+        # Position of each product in `_products`, so a retried enrichment replaces its entry in place
+        self._positions: Dict[Tuple[Websites, str], int] = {}
+        self._deal_store: Optional[DealStore] = None
+        self._store_loaded: bool = True
+        self._store_lock = threading.Lock()
         self._zip_code: str = ''
         self._is_refreshing: bool = False
         self._proxy_metrics: dict = {}
@@ -53,11 +72,49 @@ class MainScreenModel(BaseScreenModel):
         self._is_running = value
         self.notify_observers('main screen')
 
+    def use_deal_store(self, deal_store: DealStore):
+        """
+        Persist products to `deal_store`. Products already stored are loaded the
+        first time the model's products are accessed.
+        """
+        self._deal_store = deal_store
+        self._store_loaded = False
+
+    def load_from_store(self):
+        if self._store_loaded:
+            return
+        # The orchestrator and UI threads both get here; only one loads and the other waits for it
+        with self._store_lock:
+            if self._store_loaded:
+                return
+            for product, archived in self._deal_store.load():
+                if archived:
+                    self._archived_products.append(product)
+                else:
+                    self._positions[self.product_key(product)] = len(self._products)
+                    self._products.append(product)
+                self.index_product(product, archived)
+            self._store_loaded = True
+        print(f'Loaded {len(self._products) + len(self._archived_products)} products from {self._deal_store.path}')
+
+    def index_product(self, product: Product, archived: bool = False):
+        key = self.product_key(product)
+        if archived or product.amazon is not None:
+            self._product_keys.add(key)
+            self._unmatched.pop(key, None)
+            self._enrichment_attempts.pop(key, None)
+        else:
+            self._unmatched[key] = product
+            attempts = self._enrichment_attempts.get(key, (0, 0.0))[0] + 1
+            retry_at = time.time() + self.enrichment_retry_delay * 2 ** (attempts - 1)
+            self._enrichment_attempts[key] = (attempts, retry_at)
+
     @property
     def products(self) -> List[Product]:
         """
         Property to get the list of products.
         """
+        self.load_from_store()
         return self._products
 
     @property
@@ -65,6 +122,7 @@ class MainScreenModel(BaseScreenModel):
         """
         Property to get the list of archived products.
         """
+        self.load_from_store()
         return self._archived_products
 
     def add_product(self, new_product: Product):
@@ -72,7 +130,18 @@ class MainScreenModel(BaseScreenModel):
         Add a new product to the list of products, ensuring no duplicates.
         If the product already exists, update the pricing and fulfillment info.
         """
-        self._products.append(new_product)
+        self.load_from_store()
+        key = self.product_key(new_product)
+        previous = self._unmatched.get(key)
+        position = self._positions.get(key)
+        if previous is not None and position is not None and self._products[position] is previous:
+            self._products[position] = new_product  # A retried enrichment replaces the unmatched entry
+        else:
+            self._positions[key] = len(self._products)
+            self._products.append(new_product)
+        self.index_product(new_product)
+        if self._deal_store:
+            self._deal_store.upsert(new_product)
         self.notify_observers('main screen')
         print('successfully added item')
 
@@ -80,11 +149,35 @@ class MainScreenModel(BaseScreenModel):
         """
         Move a product to the archived products list.
         """
+        self.load_from_store()
         if product_to_archive in self._products:
             self._products.remove(product_to_archive)
+            self._positions = {self.product_key(product): position
+                               for position, product in enumerate(self._products)}
             self._archived_products.append(product_to_archive)
+            self.index_product(product_to_archive, archived=True)
+            if self._deal_store:
+                self._deal_store.upsert(product_to_archive, archived=True)
             self.notify_observers('main screen')
 
+    @staticmethod
+    def product_key(product: Product) -> Tuple[Websites, str]:
+        return product.website, product.id
+
+    def contains_product(self, product: Product) -> bool:
+        """
+        Whether a product with the same website and id is already archived or
+        enriched with an Amazon match. A product whose enrichment failed counts
+        until its retry delay has passed, so it is enriched again when scraped
+        again after that, and for good once it has used `max_enrichment_attempts`.
+        """
+        self.load_from_store()
+        key = self.product_key(product)
+        if key in self._product_keys:
+            return True
+        attempts = self._enrichment_attempts.get(key)
+        return bool(attempts) and (attempts[0] >= self.max_enrichment_attempts or time.time() < attempts[1])
+
     @property
     def zip_code(self) -> str:
         """
@@ -1,36 +1,35 @@
 import asyncio
 import random
+import time
+from contextlib import contextmanager
 from random import uniform
 
 from playwright.async_api import Browser, BrowserContext, Page
 
+from config.config import Config
 from scraping.exceptions import UserStoppedScraper
+from scraping.har import HarArchive
+from scraping.humanization import HumanizationProfile, get_profile
 from scraping.proxies.proxies import Websites, ProxyManager
+from scraping.resource_blocker import ResourceBlocker, DEFAULT_BLOCKED_DOMAINS, DEFAULT_BLOCKED_RESOURCE_TYPES
+from utility.metrics import metrics
 from utility.utils import ProxyError
 
 
-#
-# class ScraperManager:
-#     def __init__(self, max_workers=10):
-#         self.executor = ThreadPoolExecutor(max_workers=max_workers)
-#         self.loop = asyncio.new_event_loop()
-#         threading.Thread(target=self._start_loop, daemon=True).start()
-#
-#     def _start_loop(self):
-#         asyncio.set_event_loop(self.loop)
-#         self.loop.run_forever()
-#
-#     async def start_scraper(self, scraper):
-#         await scraper.run()
-#
-#     def run_task(self, coro):
-#         asyncio.run_coroutine_threadsafe(coro, self.loop)
-#
-#     def stop(self):
-#         self.executor.shutdown(wait=False)
-
-
 class BaseScraper:
+    # Requests the scraper never uses are aborted per context; URLs matching an
+    # allowed pattern always go through. Subclasses override these per site.
+    blocked_resource_types = DEFAULT_BLOCKED_RESOURCE_TYPES
+    blocked_domains = DEFAULT_BLOCKED_DOMAINS
+    allowed_url_patterns = []
+    # Named humanization profile ('off', 'light' or 'full'), set per site
+    humanization: str = 'full'
+    # Record every context to a HAR archive or replay recorded archives offline
+    har_mode: str = Config.HAR_MODE
+    har_dir: str = Config.HAR_DIR
+    replay_humanization: str = Config.HAR_REPLAY_HUMANIZATION
+    default_viewport = {'width': 1920, 'height': 1080}
+
     def __init__(self, proxy_manager: ProxyManager, site: Websites, status_callback=None, product_callback=None):
         self.browser: Browser = None
         self.context: BrowserContext = None
@@ -46,6 +45,14 @@ class BaseScraper:
         self.status_callback = status_callback
         self.product_callback = product_callback
 
+        self.resource_blocker = ResourceBlocker(self.blocked_resource_types, self.blocked_domains,
+                                                self.allowed_url_patterns)
+        self.har = HarArchive(self.har_dir, site.site_name, self.har_mode) if self.har_mode else None
+        self.humanization_profile: HumanizationProfile = get_profile(
+            self.replay_humanization if self.har_mode == 'replay' else self.humanization)
+        self.humanization_seconds = 0.0  # Time spent simulating a user, reset per task by subclasses
+        self._humanizing_depth = 0
+
         self.exit_sites = [
             "https://www.google.com",
             "https://www.facebook.com",
@@ -113,52 +120,91 @@ class BaseScraper:
         if self.status_callback:
             self.status_callback(self.is_running)
 
+    @contextmanager
+    def humanizing(self):
+        """Count the time spent inside the block towards `humanization_seconds`, once when nested."""
+        self._humanizing_depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._humanizing_depth -= 1
+            if not self._humanizing_depth:
+                self.humanization_seconds += time.perf_counter() - started
+
+    @property
+    def viewport(self) -> dict:
+        # The viewport is fixed per context, so read Playwright's local copy instead of asking the page
+        return self.page.viewport_size or self.default_viewport
+
     async def random_sleep(self, min_seconds: float = 1.0, max_seconds: float = 3.0, steps: int = 3):
         # Wait for the page to finish loading
         await self.page.wait_for_load_state('load')
-        sleep_duration = uniform(min_seconds, max_seconds)
-
-        action = random.choice(["mouse_move", "random_mouse_move", "nothing"])
-
-        interval = sleep_duration / steps
-        for _ in range(steps):
-            if action == "mouse_move":
-                start_x = random.uniform(0, self.page.viewport_size['width'])
-                start_y = random.uniform(0, self.page.viewport_size['height'])
-                end_x = random.uniform(0, self.page.viewport_size['width'])
-                end_y = random.uniform(0, self.page.viewport_size['height'])
-                await self.human_like_mouse_move(start_x, start_y, end_x, end_y)
-            elif action == "random_mouse_move":
-                await self.move_mouse_randomly(duration=interval)
-
-            await asyncio.sleep(interval)
+        profile = self.humanization_profile
+        if not profile.sleep_scale:
+            return
+
+        with self.humanizing():
+            sleep_duration = uniform(min_seconds, max_seconds) * profile.sleep_scale
+            actions = ["mouse_move", "random_mouse_move", "nothing"] if profile.mouse_steps else ["nothing"]
+            action = random.choice(actions)
+
+            interval = sleep_duration / steps
+            for _ in range(steps):
+                started = time.perf_counter()
+                if action == "mouse_move":
+                    viewport = self.viewport
+                    await self.human_like_mouse_move(random.uniform(0, viewport['width']),
+                                                     random.uniform(0, viewport['height']),
+                                                     random.uniform(0, viewport['width']),
+                                                     random.uniform(0, viewport['height']))
+                elif action == "random_mouse_move":
+                    await self.move_mouse_randomly(duration=0)
+
+                await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+    async def setup_context(self, context: BrowserContext):
+        """Prepare every new context: HAR recording or replay first, then resource blocking."""
+        if self.har:
+            await self.har.attach(context)
+        await self.block_resources(context)
+
+    async def block_resources(self, context: BrowserContext):
+        await context.route("**/*", self.resource_blocker.handle_route)
+
+    def print_blocking_stats(self):
+        print(f"Resource blocking for {self.site}: {self.resource_blocker.get_stats()}")
 
     async def cleanup(self):
         if self.browser:
             await self.browser.close()
-
-    async def human_like_mouse_move(self, start_x, start_y, end_x, end_y, steps=100):
-        x_diff = end_x - start_x
-        y_diff = end_y - start_y
-
-        for i in range(steps):
-            x = start_x + (x_diff * i / steps) + random.uniform(-1, 1)
-            y = start_y + (y_diff * i / steps) + random.uniform(-1, 1)
-            await self.page.mouse.move(x, y)
-            await asyncio.sleep(random.uniform(0.01, 0.03))  # Small delay to simulate human movement
-
-    async def human_like_typing(self, selector, text, delay=0.1):
-        for char in text:
-            await self.page.fill(selector,
-                                 await self.page.evaluate(f'document.querySelector("{selector}").value + "{char}"'))
-            await asyncio.sleep(delay + random.uniform(-delay / 2, delay / 2))
+        self.print_blocking_stats()
+
+    async def human_like_mouse_move(self, start_x, start_y, end_x, end_y, steps=None):
+        # Playwright interpolates the intermediate mouse events itself, so a move is two round trips
+        steps = steps or self.humanization_profile.mouse_steps
+        if not steps:
+            return
+        with self.humanizing():
+            await self.page.mouse.move(start_x + random.uniform(-1, 1), start_y + random.uniform(-1, 1))
+            await self.page.mouse.move(end_x + random.uniform(-1, 1), end_y + random.uniform(-1, 1), steps=steps)
+
+    async def human_like_typing(self, selector, text, delay=None):
+        # One round trip; the browser waits `delay` between keystrokes
+        delay = self.humanization_profile.typing_delay if delay is None else delay
+        with self.humanizing():
+            await self.page.locator(selector).press_sequentially(text, delay=delay * 1000)
 
     async def move_mouse_randomly(self, duration: float, steps: int = 1):
-        for _ in range(steps):
-            x = random.randint(0, await self.page.evaluate("() => window.innerWidth"))
-            y = random.randint(0, await self.page.evaluate("() => window.innerHeight"))
-            await self.page.mouse.move(x, y)
-            await asyncio.sleep(duration / steps)
+        if not self.humanization_profile.mouse_steps:
+            return
+        with self.humanizing():
+            viewport = self.viewport
+            for _ in range(steps):
+                x = random.randint(0, viewport['width'])
+                y = random.randint(0, viewport['height'])
+                await self.page.mouse.move(x, y, steps=self.humanization_profile.mouse_steps)
+                await asyncio.sleep(duration / steps)
 
     async def scroll_random_amount(self, direction="down"):
         scroll_amount = random.randint(50, 150)  # Adjust the range as needed
@@ -168,26 +214,31 @@ class BaseScraper:
             await self.page.evaluate(f"window.scrollBy(0, -{scroll_amount});")
 
     async def scroll_up_down(self):
-        for _ in range(2):  # Scroll up and down twice
-            scroll_amount = random.randint(50, 150)  # Adjust the range as needed
-            # Scroll down
-            await self.scroll_random_amount("down")
-            await asyncio.sleep(random.uniform(0.5, 1.5))  # Small delay to simulate human behavior
-            # Scroll up
-            await self.scroll_random_amount("up")
-            await asyncio.sleep(random.uniform(0.5, 1.5))  # Small delay to simulate human behavior
+        profile = self.humanization_profile
+        with self.humanizing():
+            for _ in range(profile.scroll_passes):
+                await self.scroll_random_amount("down")
+                await asyncio.sleep(random.uniform(0.5, 1.5) * profile.sleep_scale)
+                await self.scroll_random_amount("up")
+                await asyncio.sleep(random.uniform(0.5, 1.5) * profile.sleep_scale)
 
     async def slow_scroll(self):
-        for _ in range(10):
-            await self.page.mouse.wheel(0, 500)
-            await asyncio.sleep(.25)
-        await self.page.evaluate('window.scrollTo(0, 0);')
+        # Scrolls the page through so lazily loaded content renders; only the pauses depend on the profile
+        with self.humanizing():
+            for _ in range(10):
+                await self.page.mouse.wheel(0, 500)
+                await asyncio.sleep(.25 * self.humanization_profile.sleep_scale)
+            await self.page.evaluate('window.scrollTo(0, 0);')
 
     async def go_to_home_site(self, proxy):
+        started = time.perf_counter()
         try:
-            await self.page.goto(self.site.base_url)
+            with metrics.timer('go_to_home_site', site=self.site.site_name):
+                await self.page.goto(self.site.base_url)
         except Exception as e:
             print(f"Error navigating to Home Depot base URL: {e}")
             proxy.alert = True
+            self.proxy_manager.report_failure(proxy, self.site)
             self.proxy_manager.save_proxies()
             raise ProxyError("Bad proxy detected.")
+        self.proxy_manager.report_success(proxy, self.site, time.perf_counter() - started)
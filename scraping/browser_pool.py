@@ -0,0 +1,335 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+
+from utility.metrics import metrics
+
+
+class PooledBrowser:
+    """
+    A Chromium instance owned by the pool, bound to one proxy. `browser` is None
+    while the pool is still launching it; `ready` resolves once it is up.
+    """
+
+    def __init__(self, key: str, browser: Optional[Browser], launch_time: float):
+        self.key = key
+        self.browser = browser
+        self.launch_time = launch_time
+        self.ready = asyncio.get_running_loop().create_future()
+        if browser is not None:
+            self.ready.set_result(None)
+        self.pages_served = 0
+        self.active_contexts = 0
+        self.idle_contexts: List[Tuple[Optional[str], BrowserContext]] = []  # (context_key, context)
+        self.last_used = time.monotonic()
+        self.retired = False
+
+    @property
+    def launching(self) -> bool:
+        return self.browser is None
+
+    def is_connected(self) -> bool:
+        return self.browser.is_connected()
+
+    def is_usable(self) -> bool:
+        return not self.retired and (self.launching or self.is_connected())
+
+
+class BrowserLease:
+    """A context checked out of the pool for the duration of one task."""
+
+    def __init__(self, pooled: PooledBrowser, context: BrowserContext, warm: bool,
+                 context_key: Optional[str] = None):
+        self.pooled = pooled
+        self.context = context
+        self.warm = warm
+        self.context_key = context_key
+        self.pages = 0
+
+    @property
+    def browser(self) -> Browser:
+        return self.pooled.browser
+
+    def count_page(self, *_):
+        self.pages += 1
+
+
+class BrowserPool:
+    """
+    Keeps Chromium browsers and their contexts warm across scraping tasks.
+
+    Browsers are keyed by proxy so a context is only ever reused behind the
+    proxy it was created with, and a context is only reused for the same
+    `context_key` (e.g. the ZIP code it is localized to). A browser is retired once it has served
+    `max_pages_per_browser` pages or as soon as a task using it fails.
+
+    At most `max_browsers` browsers are open at once: when the pool is full the
+    least recently used idle browser is closed to make room, and if every
+    browser is busy `acquire` waits for one to be released. Browsers idle for
+    longer than `idle_ttl` seconds are closed. Launches run outside the pool
+    lock, so a slow launch only holds up tasks waiting for that browser.
+
+    With `per_context_proxy` every proxy shares the same browsers and the proxy
+    is set on each context instead, so switching proxies costs a new context
+    rather than a browser launch. Contexts are still only reused behind the
+    proxy they were created with.
+    """
+
+    def __init__(self, max_pages_per_browser: int = 50, max_contexts_per_browser: int = 4,
+                 headless: bool = True, name: str = 'default', max_browsers: int = 8, idle_ttl: float = 300.0,
+                 per_context_proxy: bool = False):
+        self.name = name
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_contexts_per_browser = max_contexts_per_browser
+        self.max_browsers = max_browsers
+        self.idle_ttl = idle_ttl
+        self.headless = headless
+        self.per_context_proxy = per_context_proxy
+
+        self._playwright: Optional[Playwright] = None
+        self._browsers: Dict[str, List[PooledBrowser]] = {}
+        self._lock = asyncio.Condition()  # Notified whenever a browser is released or retired
+
+        self.hits = 0
+        self.misses = 0
+        self.launches = 0
+        self.recycled = 0
+        self.evicted = 0
+        self.launch_seconds = 0.0
+        self.max_launch_seconds = 0.0
+        metrics.register_gauge('open_browsers', lambda: self.open_browsers, pool=name)
+
+    @staticmethod
+    def proxy_key(proxy) -> str:
+        return f"{proxy.ip}:{proxy.port}" if proxy else "direct"
+
+    async def start(self):
+        if not self._playwright:
+            self._playwright = await async_playwright().start()
+
+    async def acquire(self, proxy=None, context_setup: Optional[Callable] = None,
+                      context_key: Optional[str] = None, **context_options) -> BrowserLease:
+        """
+        Check out a context behind `proxy`. An idle warm context with the same
+        `context_key` is reused when one exists, otherwise a new context is
+        opened on a warm browser, and a browser is only launched when neither
+        is available.
+        """
+        await self.start()
+        key = self.proxy_key(proxy)
+        if self.per_context_proxy:
+            context_key = f"{key}/{context_key}" if context_key else key
+            if proxy:
+                context_options['proxy'] = {'server': f'http://{proxy.ip}:{proxy.port}'}
+            key = 'shared'
+        closing: List[PooledBrowser] = []
+        evicted: List[BrowserContext] = []
+        launch = False
+
+        async with self._lock:
+            while True:
+                closing += self._expire_idle()
+                warm = self._take_idle_context(key, context_key)
+                if warm:
+                    pooled, context = warm
+                    self.hits += 1
+                    break
+
+                context = None
+                pooled = next((b for b in self._browsers.get(key, [])
+                               if b.is_usable() and b.active_contexts < self.max_contexts_per_browser), None)
+                if pooled is None and self.open_browsers >= self.max_browsers:
+                    victim = self._least_recently_used_idle()
+                    if victim:
+                        self._detach(victim)
+                        self.evicted += 1
+                        closing.append(victim)
+                if pooled is None and self.open_browsers < self.max_browsers:
+                    # Reserve the slot now and launch once the lock is released
+                    pooled = PooledBrowser(key, None, 0.0)
+                    self._browsers.setdefault(key, []).append(pooled)
+                    launch = True
+                if pooled is not None:
+                    self.misses += 1
+                    break
+                await self._lock.wait()  # Every browser is busy
+
+            pooled.active_contexts += 1
+            pooled.last_used = time.monotonic()
+            if context is None:
+                # Idle contexts for other keys count against the browser's context budget
+                while (pooled.idle_contexts
+                       and pooled.active_contexts + len(pooled.idle_contexts) > self.max_contexts_per_browser):
+                    evicted.append(pooled.idle_contexts.pop(0)[1])
+
+        for browser in closing:
+            await self._close_browser(browser)
+        for idle_context in evicted:
+            await self._close_context(idle_context)
+        if context is not None:
+            return BrowserLease(pooled, context, warm=True, context_key=context_key)
+
+        if launch:
+            await self._launch(pooled, proxy)
+        else:
+            await asyncio.shield(pooled.ready)
+        try:
+            context = await pooled.browser.new_context(**context_options)
+            if context_setup:
+                await context_setup(context)
+        except Exception:
+            pooled.active_contexts -= 1
+            pooled.retired = True
+            if pooled.active_contexts <= 0:
+                await self._retire(pooled)
+            raise
+        return BrowserLease(pooled, context, warm=False, context_key=context_key)
+
+    async def release(self, lease: BrowserLease, failed: bool = False):
+        """
+        Return a lease to the pool. Open pages are closed but the context is kept
+        warm unless the task failed or the browser reached its page budget.
+        """
+        pooled = lease.pooled
+        pooled.active_contexts -= 1
+        pooled.pages_served += lease.pages
+        pooled.last_used = time.monotonic()
+
+        if failed or pooled.pages_served >= self.max_pages_per_browser:
+            pooled.retired = True
+
+        if pooled.retired or not pooled.is_connected():
+            await self._close_context(lease.context)
+            if pooled.active_contexts <= 0:
+                await self._retire(pooled)
+        else:
+            try:
+                for page in lease.context.pages:
+                    await page.close()
+                pooled.idle_contexts.append((lease.context_key, lease.context))
+            except Exception as e:
+                print(f"Error returning context to pool: {e}")
+                pooled.retired = True
+                await self._close_context(lease.context)
+        await self._notify()
+
+    async def close(self):
+        for browsers in list(self._browsers.values()):
+            for pooled in list(browsers):
+                await self._retire(pooled, recycled=False)
+        self._browsers.clear()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def _take_idle_context(self, key: str, context_key: Optional[str]) \
+            -> Optional[Tuple[PooledBrowser, BrowserContext]]:
+        for pooled in self._browsers.get(key, []):
+            if pooled.launching or not pooled.is_usable():
+                continue
+            for index, (idle_key, context) in enumerate(pooled.idle_contexts):
+                if idle_key == context_key:
+                    del pooled.idle_contexts[index]
+                    return pooled, context
+        return None
+
+    def _idle_browsers(self) -> List[PooledBrowser]:
+        return [pooled for browsers in self._browsers.values() for pooled in browsers
+                if not pooled.launching and pooled.active_contexts <= 0]
+
+    def _least_recently_used_idle(self) -> Optional[PooledBrowser]:
+        return min(self._idle_browsers(), key=lambda pooled: pooled.last_used, default=None)
+
+    def _expire_idle(self) -> List[PooledBrowser]:
+        now = time.monotonic()
+        expired = [pooled for pooled in self._idle_browsers() if now - pooled.last_used > self.idle_ttl]
+        for pooled in expired:
+            self._detach(pooled)
+            self.evicted += 1
+        return expired
+
+    async def _launch(self, pooled: PooledBrowser, proxy):
+        launch_options = {'headless': self.headless}
+        if self.per_context_proxy:
+            # Same placeholder as refresh_proxy_list; some Chromium builds need one for per-context proxies
+            launch_options['proxy'] = {'server': 'http://per-context'}
+        elif proxy:
+            launch_options['proxy'] = {'server': f'http://{proxy.ip}:{proxy.port}'}
+
+        started = time.perf_counter()
+        try:
+            browser = await self._playwright.chromium.launch(**launch_options)
+        except Exception as e:
+            # Tasks waiting on this browser fail with the same error
+            self._detach(pooled, recycled=False)
+            pooled.ready.set_exception(e)
+            pooled.ready.exception()  # Retrieved, even when nobody else was waiting
+            await self._notify()
+            raise
+        elapsed = time.perf_counter() - started
+
+        self.launches += 1
+        self.launch_seconds += elapsed
+        self.max_launch_seconds = max(self.max_launch_seconds, elapsed)
+        metrics.observe('stage_seconds', elapsed, stage='browser_launch')
+        print(f"Launched browser for {pooled.key} in {elapsed:.2f}s")
+
+        pooled.browser = browser
+        pooled.launch_time = elapsed
+        pooled.ready.set_result(None)
+
+    def _detach(self, pooled: PooledBrowser, recycled: bool = True):
+        pooled.retired = True
+        browsers = self._browsers.get(pooled.key, [])
+        if pooled in browsers:
+            browsers.remove(pooled)
+            if not browsers:
+                del self._browsers[pooled.key]
+            if recycled:
+                self.recycled += 1
+
+    async def _retire(self, pooled: PooledBrowser, recycled: bool = True):
+        self._detach(pooled, recycled)
+        await self._close_browser(pooled)
+        await self._notify()
+
+    async def _close_browser(self, pooled: PooledBrowser):
+        for _, context in pooled.idle_contexts:
+            await self._close_context(context)
+        pooled.idle_contexts.clear()
+        try:
+            if not pooled.launching and pooled.is_connected():
+                await pooled.browser.close()
+        except Exception as e:
+            print(f"Error closing pooled browser: {e}")
+
+    async def _notify(self):
+        async with self._lock:
+            self._lock.notify_all()
+
+    @staticmethod
+    async def _close_context(context: BrowserContext):
+        try:
+            await context.close()
+        except Exception as e:
+            print(f"Error closing browser context: {e}")
+
+    @property
+    def open_browsers(self) -> int:
+        return sum(len(browsers) for browsers in self._browsers.values())
+
+    def get_metrics(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+            'launches': self.launches,
+            'recycled': self.recycled,
+            'evicted': self.evicted,
+            'open_browsers': self.open_browsers,
+            'avg_launch_seconds': self.launch_seconds / self.launches if self.launches else 0.0,
+            'max_launch_seconds': self.max_launch_seconds,
+        }
@@ -0,0 +1,81 @@
+from typing import Dict, Hashable, List, Optional, Set
+
+
+class PassYield:
+    """Items seen during one sort pass over a category and how many of them were new."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.new_items = 0
+        self.new_deals = 0
+
+    @property
+    def yield_ratio(self) -> float:
+        return self.new_items / self.items if self.items else 0.0
+
+
+class CoverageTracker:
+    """
+    Tracks the item ids seen per category across the sort passes over it.
+
+    Each pass records how many of its items had not been seen in an earlier
+    pass. Once a pass adds fewer than `min_yield` new items per item seen, the
+    remaining passes over that category are skipped.
+    """
+
+    def __init__(self, min_yield: float = 0.05):
+        self.min_yield = min_yield
+        self.seen: Dict[Hashable, Set[str]] = {}
+        self.passes: Dict[Hashable, List[PassYield]] = {}
+        self.skipped_passes = 0
+
+    def start_pass(self, category: Hashable, name: str):
+        self.passes.setdefault(category, []).append(PassYield(name))
+
+    def record_item(self, category: Hashable, item_id: Optional[str]) -> bool:
+        """Count an item for the category's current pass; returns True if it is new."""
+        passes = self.passes.get(category)
+        if not passes or not item_id:
+            return False
+        current = passes[-1]
+        current.items += 1
+        seen = self.seen.setdefault(category, set())
+        if item_id in seen:
+            return False
+        seen.add(item_id)
+        current.new_items += 1
+        return True
+
+    def record_deal(self, category: Hashable):
+        passes = self.passes.get(category)
+        if passes:
+            passes[-1].new_deals += 1
+
+    def should_continue(self, category: Hashable, remaining_passes: int = 0) -> bool:
+        """Whether another pass is worth running after the category's latest pass."""
+        passes = self.passes.get(category)
+        if not passes or len(passes) < 2:
+            return True
+        if passes[-1].yield_ratio >= self.min_yield:
+            return True
+        self.skipped_passes += remaining_passes
+        return False
+
+    def get_stats(self) -> dict:
+        """Totals per pass name across all categories, in the order the passes ran."""
+        by_name: Dict[str, dict] = {}
+        for passes in self.passes.values():
+            for current in passes:
+                stats = by_name.setdefault(current.name, {'runs': 0, 'items': 0, 'new_items': 0, 'new_deals': 0})
+                stats['runs'] += 1
+                stats['items'] += current.items
+                stats['new_items'] += current.new_items
+                stats['new_deals'] += current.new_deals
+        for stats in by_name.values():
+            stats['yield'] = stats['new_items'] / stats['items'] if stats['items'] else 0.0
+        return {
+            'categories': len(self.passes),
+            'skipped_passes': self.skipped_passes,
+            'passes': by_name,
+        }
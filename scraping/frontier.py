@@ -0,0 +1,155 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    round INTEGER NOT NULL,
+    zip_code TEXT NOT NULL,
+    department_name TEXT NOT NULL,
+    department TEXT NOT NULL,
+    special TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    leased_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (round, zip_code, department_name, special)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (round, state, id);
+"""
+
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+
+
+class FrontierTask:
+    def __init__(self, task_id: int, round_id: int, zip_code: str, department: Dict[str, str],
+                 special: str, attempts: int):
+        self.id = task_id
+        self.round = round_id
+        self.zip_code = zip_code
+        self.department = department
+        self.special = special
+        self.attempts = attempts
+
+
+class CrawlFrontier:
+    """
+    Durable queue of (zip code, department, special) crawl tasks in SQLite.
+
+    A crawl round seeds one task per combination. Workers lease the next
+    pending task and mark it done or failed; failed tasks go back to pending
+    until they have used `max_attempts`. Leases that expire, or that are
+    left behind by a process that crashed, are handed out again, so a
+    restart resumes the unfinished round where it stopped.
+
+    Several processes may crawl from the same file. Only the first one to
+    open it should pass `reclaim_leases`, since leases held at that point
+    would otherwise be taken from processes that are still working on them.
+    """
+
+    def __init__(self, path: str = 'frontier.db', lease_seconds: float = 3600, max_attempts: int = 3,
+                 reclaim_leases: bool = True):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+        # Leases left at startup belong to a dead run
+        reclaimed = self.release_leases() if reclaim_leases else 0
+        if reclaimed:
+            print(f"Reclaimed {reclaimed} crawl tasks left leased by the previous run")
+
+    @property
+    def current_round(self) -> int:
+        with self._lock:
+            row = self._connection.execute("SELECT MAX(round) FROM tasks").fetchone()
+        return row[0] or 0
+
+    def start_round(self, tasks: Iterable[Tuple[str, Dict[str, str], str]]) -> int:
+        """
+        Resume the latest round if it still has unfinished tasks, otherwise seed a
+        new round with `tasks` (zip code, department, special). Returns the round id.
+        """
+        round_id = self.current_round
+        counts = self.counts(round_id) if round_id else {}
+        if counts.get(PENDING, 0) + counts.get(LEASED, 0):
+            print(f"Resuming crawl round {round_id}: {counts}")
+            return round_id
+
+        round_id += 1
+        now = time.time()
+        rows = [(round_id, zip_code, department['name'], json.dumps(department), special, now, now)
+                for zip_code, department, special in tasks]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO tasks (round, zip_code, department_name, department, special, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        print(f"Started crawl round {round_id} with {len(rows)} tasks")
+        return round_id
+
+    def lease(self, round_id: int) -> Optional[FrontierTask]:
+        """Lease the next pending task of the round, reclaiming expired leases first."""
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE tasks SET state = ?, updated_at = ? WHERE round = ? AND state = ? AND leased_until < ?",
+                (PENDING, now, round_id, LEASED, now))
+            row = self._connection.execute(
+                "SELECT id, zip_code, department, special, attempts FROM tasks "
+                "WHERE round = ? AND state = ? ORDER BY id LIMIT 1", (round_id, PENDING)).fetchone()
+            if row is None:
+                return None
+            task_id, zip_code, department, special, attempts = row
+            self._connection.execute(
+                "UPDATE tasks SET state = ?, attempts = attempts + 1, leased_until = ?, updated_at = ? "
+                "WHERE id = ?", (LEASED, now + self.lease_seconds, now, task_id))
+        return FrontierTask(task_id, round_id, zip_code, json.loads(department), special, attempts + 1)
+
+    def complete(self, task: FrontierTask):
+        self._set_state(task, DONE)
+
+    def fail(self, task: FrontierTask):
+        """Return the task to pending, or mark it failed once it has used `max_attempts`."""
+        self._set_state(task, FAILED if task.attempts >= self.max_attempts else PENDING)
+
+    def release(self, task: FrontierTask):
+        """Give a leased task back unfinished, e.g. because the scraper was stopped."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE tasks SET state = ?, attempts = attempts - 1, leased_until = NULL, updated_at = ? "
+                "WHERE id = ?", (PENDING, time.time(), task.id))
+
+    def release_leases(self) -> int:
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "UPDATE tasks SET state = ?, leased_until = NULL, updated_at = ? WHERE state = ?",
+                (PENDING, time.time(), LEASED))
+        return cursor.rowcount
+
+    def counts(self, round_id: int) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT state, COUNT(*) FROM tasks WHERE round = ? GROUP BY state", (round_id,)).fetchall()
+        return dict(rows)
+
+    def _set_state(self, task: FrontierTask, state: str):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE tasks SET state = ?, leased_until = NULL, updated_at = ? WHERE id = ?",
+                (state, time.time(), task.id))
+
+    def close(self):
+        try:
+            self._connection.close()
+        except sqlite3.ProgrammingError:
+            pass  # Already closed
@@ -0,0 +1,79 @@
+import glob
+import itertools
+import json
+import os
+import time
+from typing import List, Optional
+
+from playwright.async_api import BrowserContext
+
+from utility.files import write_atomic
+
+HAR_MODES = ('', 'record', 'replay')
+
+
+class HarArchive:
+    """
+    Records every browser context of a scraper to its own HAR file, or serves
+    contexts entirely from the HAR files recorded before.
+
+    Recordings go to `<directory>/<site>/<timestamp>-<n>.har` and are written
+    by Playwright when the context closes. In replay, the site's recordings are
+    merged into `<directory>/<site>.replay.har` (rebuilt whenever a recording is
+    newer), every context is routed to that one archive and anything it does
+    not contain is aborted, so the scraper never touches the network.
+    """
+
+    def __init__(self, directory: str, site_name: str, mode: str):
+        if mode not in HAR_MODES:
+            raise ValueError(f"Unknown HAR mode {mode!r}, expected 'record' or 'replay'")
+        self.directory = os.path.join(directory, site_name)
+        self.mode = mode
+        self.replay_path = self.directory + '.replay.har'
+        self._counter = itertools.count()
+        self._merged: Optional[str] = None
+        self.recorded = 0
+
+    def recordings(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, '*.har')))
+
+    def next_path(self) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._counter)}.har")
+
+    def merged_recordings(self) -> str:
+        """
+        Path of one archive holding the entries of every recording, newest first
+        so a request recorded more than once is answered from its latest recording.
+        """
+        if self._merged:
+            return self._merged
+        recordings = self.recordings()
+        if not recordings:
+            raise FileNotFoundError(f"No HAR recordings in {self.directory} to replay")
+        if (not os.path.exists(self.replay_path)
+                or os.path.getmtime(self.replay_path) < max(os.path.getmtime(path) for path in recordings)):
+            merged = None
+            for path in reversed(recordings):
+                with open(path, 'r') as f:
+                    log = json.load(f)['log']
+                if merged is None:
+                    merged = log
+                else:
+                    merged['pages'] = merged.get('pages', []) + log.get('pages', [])
+                    merged['entries'] += log['entries']
+            write_atomic(self.replay_path, lambda f: json.dump({'log': merged}, f))
+            print(f"Merged {len(recordings)} HAR recordings into {self.replay_path}")
+        self._merged = self.replay_path
+        return self._merged
+
+    async def attach(self, context: BrowserContext):
+        if self.mode == 'record':
+            await context.route_from_har(self.next_path(), update=True, update_content='embed',
+                                         update_mode='minimal')
+            self.recorded += 1
+        elif self.mode == 'replay':
+            replay_path = self.merged_recordings()
+            # Routes registered later run first: requests the archive did not record end at the abort
+            await context.route("**/*", lambda route: route.abort())
+            await context.route_from_har(replay_path, not_found='fallback')
@@ -0,0 +1,35 @@
+class HumanizationProfile:
+    """
+    How much human-like behaviour a scraper simulates between actions.
+
+    `sleep_scale` multiplies every `random_sleep` range, `mouse_steps` is the
+    number of intermediate points Playwright interpolates for a single
+    `mouse.move` call (0 disables mouse movement), `scroll_passes` is how many
+    down/up scrolls `scroll_up_down` makes and `typing_delay` is the pause
+    between keystrokes in seconds.
+    """
+
+    def __init__(self, name: str, sleep_scale: float, mouse_steps: int, scroll_passes: int,
+                 typing_delay: float):
+        self.name = name
+        self.sleep_scale = sleep_scale
+        self.mouse_steps = mouse_steps
+        self.scroll_passes = scroll_passes
+        self.typing_delay = typing_delay
+
+    def __repr__(self):
+        return f"HumanizationProfile({self.name!r})"
+
+
+PROFILES = {
+    'off': HumanizationProfile('off', sleep_scale=0.0, mouse_steps=0, scroll_passes=0, typing_delay=0.0),
+    'light': HumanizationProfile('light', sleep_scale=0.3, mouse_steps=10, scroll_passes=1, typing_delay=0.05),
+    'full': HumanizationProfile('full', sleep_scale=1.0, mouse_steps=25, scroll_passes=2, typing_delay=0.1),
+}
+
+
+def get_profile(name: str) -> HumanizationProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown humanization profile {name!r}, expected one of {sorted(PROFILES)}")
@@ -0,0 +1,421 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from config.config import Config
+from model.deal_store import SITES_BY_NAME
+from model.item import Product
+from scraping.frontier import CrawlFrontier
+from scraping.proxies.proxies import ProxyManager
+from scraping.scrapers.home_depot import HomeDepotScraper
+from utility.metrics import LabelKey, metrics
+from utility.utils import Websites
+
+
+def product_to_message(product: Product) -> dict:
+    data = product.dict(exclude={'amazon'})
+    data['website'] = product.website.site_name
+    return data
+
+
+def product_from_message(data: dict) -> Product:
+    data['website'] = SITES_BY_NAME[data['website']]
+    return Product(**data)
+
+
+class ShardProxyManager(ProxyManager):
+    """
+    Proxy manager of a worker process. Health reports are applied here and also
+    queued for the parent, which applies them to its own manager and owns the
+    status file.
+    """
+    status_file = None
+
+    def __init__(self):
+        super().__init__()
+        self.reports: List[tuple] = []  # (proxy key, site name, success, latency, alert)
+        self._reports_lock = threading.Lock()
+
+    def record_success(self, key: str, site_name: str, latency: Optional[float] = None):
+        super().record_success(key, site_name, latency)
+        self.queue_report(key, site_name, True, latency)
+
+    def record_failure(self, key: str, site_name: str):
+        super().record_failure(key, site_name)
+        self.queue_report(key, site_name, False, None)
+
+    def queue_report(self, key: str, site_name: str, success: bool, latency: Optional[float]):
+        proxy = self.proxies_by_key.get(key)
+        with self._reports_lock:
+            self.reports.append((key, site_name, success, latency, bool(proxy and proxy.alert)))
+
+    def take_reports(self) -> List[tuple]:
+        with self._reports_lock:
+            reports, self.reports = self.reports, []
+        return reports
+
+
+class ShardWorker:
+    """
+    Runs one share of the Home Depot crawl inside a worker process.
+
+    Products are sent to the parent in batches of `batch_size`, or whenever
+    a heartbeat is due, along with the process' metrics and proxy health
+    reports. Setting the stop event lets the current tasks finish before the
+    scraper exits.
+    """
+
+    def __init__(self, index: int, messages, stop_event, batch_size: int, heartbeat_interval: float):
+        self.index = index
+        self.messages = messages
+        self.stop_event = stop_event
+        self.batch_size = batch_size
+        self.heartbeat_interval = heartbeat_interval
+        self.proxy_manager = ShardProxyManager()
+        self.scraper: Optional[HomeDepotScraper] = None
+        self._batch: List[dict] = []
+        self._lock = threading.Lock()
+        self._exited = threading.Event()
+
+    def product_found(self, product: Product):
+        with self._lock:
+            self._batch.append(product_to_message(product))
+            full = len(self._batch) >= self.batch_size
+        if full:
+            self.flush()
+
+    def send(self, kind: str, payload):
+        # Blocks while the parent is behind, which slows this shard down instead of buffering
+        self.messages.put((kind, self.index, os.getpid(), payload))
+
+    def flush(self):
+        with self._lock:
+            batch, self._batch = self._batch, []
+        if batch:
+            self.send('products', batch)
+        reports = self.proxy_manager.take_reports()
+        if reports:
+            self.send('proxies', reports)
+
+    def heartbeat(self):
+        self.send('heartbeat', metrics.snapshot())
+
+    def monitor(self):
+        while not self._exited.wait(self.heartbeat_interval):
+            if self.stop_event.is_set() and self.scraper.is_running:
+                print(f"Stopping crawl shard {self.index} after its current tasks")
+                self.scraper.is_running = False
+            try:
+                self.flush()
+                self.heartbeat()
+            except Exception as e:
+                print(f"Error reporting from crawl shard {self.index}: {e}")
+
+    def run(self, proxies: List[dict], zip_code: Optional[str]):
+        if proxies:
+            self.proxy_manager.load_snapshot(proxies)
+
+        # Every worker leases tasks from the same frontier, whose leases the parent reclaimed before
+        # starting them, so progress carries over whatever the number of workers. Store sessions are
+        # per worker since a session file has a single writer.
+        self.scraper = HomeDepotScraper(proxy_manager=self.proxy_manager, product_callback=self.product_found,
+                                        store_sessions_file=f"store_sessions-{self.index}.json")
+        self.scraper.frontier = CrawlFrontier(self.scraper.frontier_path, reclaim_leases=False)
+        if zip_code:
+            self.scraper.set_zip_code(zip_code)
+
+        self.send('started', None)
+        threading.Thread(target=self.monitor, name=f'shard-{self.index}-monitor', daemon=True).start()
+        error = None
+        try:
+            self.scraper.start()
+        except Exception as e:
+            error = repr(e)
+        finally:
+            self._exited.set()
+            self.flush()
+            self.heartbeat()
+            self.send('exited', error)
+
+
+def run_shard(index: int, proxies: List[dict], zip_code: Optional[str], messages, stop_event, batch_size: int,
+              heartbeat_interval: float):
+    """Entry point of a worker process."""
+    ShardWorker(index, messages, stop_event, batch_size, heartbeat_interval).run(proxies, zip_code)
+
+
+class WorkerStatus:
+    def __init__(self, index: int):
+        self.index = index
+        self.pid: Optional[int] = None
+        self.started = time.monotonic()
+        self.last_heartbeat = self.started
+        self.products = 0
+        self.restarts = 0
+        # Last metrics reported by the worker process, to merge only what changed since
+        self.counters: Dict[LabelKey, float] = {}
+        self.histograms: Dict[LabelKey, tuple] = {}
+        self.error: Optional[str] = None
+        self.exited = False
+        self.failed = False
+
+    def restart(self):
+        self.pid = None
+        self.started = self.last_heartbeat = time.monotonic()
+        self.products = 0
+        self.counters = {}
+        self.histograms = {}
+        self.exited = False
+        self.restarts += 1
+
+    def counter(self, name: str) -> float:
+        return sum(value for (counter_name, _), value in self.counters.items() if counter_name == name)
+
+    def heartbeat_age(self) -> float:
+        return time.monotonic() - self.last_heartbeat
+
+    def is_healthy(self, heartbeat_timeout: float) -> bool:
+        return not self.exited and self.heartbeat_age() < heartbeat_timeout
+
+    def get_metrics(self, heartbeat_timeout: float) -> dict:
+        minutes = (time.monotonic() - self.started) / 60
+        pages = self.counter('pages_total')
+        return {
+            'worker': self.index,
+            'pid': self.pid,
+            'healthy': self.is_healthy(heartbeat_timeout),
+            'heartbeat_age': self.heartbeat_age(),
+            'restarts': self.restarts,
+            'products': self.products,
+            'pages': pages,
+            'products_per_minute': self.products / minutes if minutes else 0.0,
+            'pages_per_minute': pages / minutes if minutes else 0.0,
+            'error': self.error,
+        }
+
+
+class ScraperOrchestrator:
+    """
+    Splits the Home Depot crawl across worker processes, each with its own
+    event loop and browser pool, that lease tasks from one shared frontier.
+
+    The proxies usable for Home Depot are divided between the workers, so each
+    proxy's health, cooldowns and `max_tasks_per_proxy` slots are tracked by
+    the only process using it, and there are never more workers than usable
+    proxies. Workers forward their health reports; this process applies them
+    to its own proxy manager, which saves alerts to the status file.
+
+    Workers stream discovered products back in batches over a bounded queue
+    and send a heartbeat with their metrics every `heartbeat_interval`. A
+    thread in this process hands the products to `product_callback`, folds
+    worker metrics into the process-wide registry and restarts workers that
+    die or stop sending heartbeats, up to `max_restarts` times each.
+    """
+    batch_size: int = 25  # Products per IPC message
+    queue_size: int = 200  # Messages buffered before workers block
+    heartbeat_interval: float = 5.0
+    heartbeat_timeout: float = 120.0  # Longer than any single blocking step in a worker
+    max_restarts: int = 3
+    stop_timeout: float = 60.0  # How long stopping workers may finish their tasks before they are terminated
+
+    def __init__(self, proxy_manager: ProxyManager, product_callback: Callable[[Product], None],
+                 status_callback: Optional[Callable[[bool], None]] = None, workers: Optional[int] = None):
+        self.proxy_manager = proxy_manager
+        self.product_callback = product_callback
+        self.status_callback = status_callback
+        self.max_workers = workers or Config.SCRAPER_WORKERS or 1
+        self.workers = self.max_workers
+        self.shard_proxies: List[List[dict]] = []
+        self.zip_code: Optional[str] = None
+        self.is_running = False
+        # Spawned workers do not inherit the parent's threads or UI state
+        self._context = multiprocessing.get_context('spawn')
+        self.messages = None
+        self.stop_event = None
+        self.processes: Dict[int, multiprocessing.process.BaseProcess] = {}
+        self.status: Dict[int, WorkerStatus] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop_requested = 0.0
+        metrics.register_gauge('workers_healthy', lambda: sum(
+            status.is_healthy(self.heartbeat_timeout) for status in list(self.status.values())))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            print("Scraper workers are already running.")
+            return
+        self.is_running = True
+        self.shard_proxies = self.partition_proxies()
+        self.workers = len(self.shard_proxies)
+        # Leases left by the previous run are reclaimed once, before any worker holds one
+        CrawlFrontier(HomeDepotScraper.frontier_path).close()
+        self.messages = self._context.Queue(self.queue_size)
+        self.stop_event = self._context.Event()
+        self.processes = {}
+        self.status = {index: WorkerStatus(index) for index in range(self.workers)}
+        for index in range(self.workers):
+            self.spawn(index)
+        print(f"Started {self.workers} scraper workers")
+
+        self._thread = threading.Thread(target=self.supervise, name='orchestrator', daemon=True)
+        self._thread.start()
+        if self.status_callback:
+            self.status_callback(self.is_running)
+
+    def spawn(self, index: int):
+        process = self._context.Process(
+            target=run_shard, name=f'home-depot-shard-{index}', daemon=True,
+            args=(index, self.shard_proxies[index], self.zip_code, self.messages, self.stop_event,
+                  self.batch_size, self.heartbeat_interval))
+        process.start()
+        self.processes[index] = process
+
+    def partition_proxies(self) -> List[List[dict]]:
+        """The proxies each worker may use, one list per worker."""
+        proxies = self.proxy_manager.snapshot()
+        if not proxies:
+            return [[] for _ in range(self.max_workers)]
+        usable = [proxy for proxy in proxies if proxy['sites'].get(Websites.HOME_DEPOT.site_name) is not False]
+        if not usable:
+            return [proxies]  # None passed validation; a single worker waits for one to recover
+        workers = min(self.max_workers, len(usable))
+        return [usable[index::workers] for index in range(workers)]
+
+    def stop(self):
+        """Ask every worker to finish its current tasks; stragglers are terminated after `stop_timeout`."""
+        if not self.is_running:
+            return
+        print("Stopping scraper workers.")
+        self.is_running = False
+        self._stop_requested = time.monotonic()
+        self.stop_event.set()
+
+    def set_zip_code(self, zip_code: str):
+        # Picked up by workers started after this
+        self.zip_code = zip_code
+
+    def supervise(self):
+        while self.is_running or any(process.is_alive() for process in self.processes.values()):
+            drained = False
+            try:
+                self.handle(*self.messages.get(timeout=self.heartbeat_interval))
+            except queue.Empty:
+                drained = True
+            except Exception as e:
+                print(f"Error handling scraper worker message: {e}")
+            self.check_workers(drained)
+
+        # Products sent right before the workers exited
+        while True:
+            try:
+                self.handle(*self.messages.get_nowait())
+            except queue.Empty:
+                break
+        print(f"Scraper workers stopped: {self.get_metrics()}")
+        if self.status_callback:
+            self.status_callback(False)
+
+    def handle(self, kind: str, index: int, pid: int, payload):
+        status = self.status[index]
+        if kind == 'products':
+            status.products += len(payload)
+            metrics.inc('worker_products_total', len(payload), worker=index)
+            for data in payload:
+                self.product_callback(product_from_message(data))
+        elif kind == 'proxies':
+            self.apply_proxy_reports(payload)
+        elif kind == 'started':
+            status.pid = pid
+        elif pid != status.pid:
+            return  # Left in the queue by a worker process that has since been replaced
+        elif kind == 'heartbeat':
+            status.last_heartbeat = time.monotonic()
+            self.merge_metrics(status, payload)
+        elif kind == 'exited':
+            status.exited = True
+            status.error = payload
+            if payload:
+                print(f"Scraper worker {index} failed: {payload}")
+
+    def apply_proxy_reports(self, reports: List[tuple]):
+        alerted = False
+        for key, site_name, success, latency, alert in reports:
+            if success:
+                self.proxy_manager.record_success(key, site_name, latency)
+            else:
+                self.proxy_manager.record_failure(key, site_name)
+            proxy = self.proxy_manager.proxies_by_key.get(key)
+            if alert and proxy and not proxy.alert:
+                proxy.alert = alerted = True
+        if alerted:
+            self.proxy_manager.save_proxies()
+
+    @staticmethod
+    def merge_metrics(status: WorkerStatus, snapshot: dict):
+        """
+        Fold a worker's metrics snapshot into this process' registry under a `worker`
+        label. Counters and histograms restart from zero with the worker process, so
+        only their increase since the previous snapshot is added.
+        """
+        for key, value in snapshot['counters'].items():
+            previous = status.counters.get(key, 0)
+            metrics.inc(key[0], value - previous if value >= previous else value,
+                        worker=status.index, **dict(key[1]))
+            status.counters[key] = value
+        for (name, labels), value in snapshot['gauges'].items():
+            metrics.set_gauge(name, value, worker=status.index, **dict(labels))
+        for key, (buckets, counts, count, total) in snapshot['histograms'].items():
+            previous = status.histograms.get(key)
+            if previous and count >= previous[2]:
+                counts_added = [new - old for new, old in zip(counts, previous[1])]
+                total_added = total - previous[3]
+            else:
+                counts_added, total_added = counts, total
+            if any(counts_added):
+                metrics.merge_histogram(key[0], buckets, counts_added, total_added,
+                                        worker=status.index, **dict(key[1]))
+            status.histograms[key] = (buckets, counts, count, total)
+
+    def check_workers(self, drained: bool):
+        for index, process in list(self.processes.items()):
+            status = self.status[index]
+            if not self.is_running:
+                if process.is_alive() and time.monotonic() - self._stop_requested > self.stop_timeout:
+                    print(f"Terminating scraper worker {index}")
+                    process.terminate()
+                continue
+            # Heartbeats may be waiting behind products while this thread is busy, so a
+            # worker only counts as hung once the queue has been drained
+            if drained and process.is_alive() and status.heartbeat_age() > self.heartbeat_timeout:
+                print(f"Scraper worker {index} sent no heartbeat for {status.heartbeat_age():.0f}s, terminating")
+                process.terminate()
+                process.join(5)
+            if process.is_alive() or status.failed:
+                continue
+
+            status.exited = True
+            if status.restarts >= self.max_restarts:
+                print(f"Scraper worker {index} exited with code {process.exitcode}, giving up on its shard")
+                status.failed = True
+                continue
+            print(f"Scraper worker {index} exited with code {process.exitcode}, restarting")
+            status.restart()
+            metrics.inc('worker_restarts_total', worker=index)
+            self.spawn(index)
+
+        if self.is_running and all(status.failed for status in self.status.values()):
+            print("Every scraper worker failed.")
+            self.is_running = False
+
+    def get_metrics(self) -> dict:
+        workers = [status.get_metrics(self.heartbeat_timeout) for status in self.status.values()]
+        return {
+            'workers': len(workers),
+            'healthy': sum(worker['healthy'] for worker in workers),
+            'products': sum(worker['products'] for worker in workers),
+            'products_per_minute': sum(worker['products_per_minute'] for worker in workers),
+            'pages_per_minute': sum(worker['pages_per_minute'] for worker in workers),
+            'per_worker': workers,
+        }
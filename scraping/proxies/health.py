@@ -0,0 +1,105 @@
+import heapq
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class ProxyHealth:
+    """
+    Health of one proxy for one site: EWMAs of success rate and latency plus a
+    circuit breaker that takes the proxy out of rotation after repeated failures.
+    """
+
+    alpha: float = 0.2
+    failure_threshold: int = 3
+    base_cooldown: float = 60.0
+    max_cooldown: float = 900.0
+    latency_scale: float = 5.0
+
+    def __init__(self, success_rate: float = 1.0):
+        self.success_rate = success_rate
+        self.latency = 0.0
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+
+    @property
+    def score(self) -> float:
+        return self.success_rate / (1 + self.latency / self.latency_scale)
+
+    def is_open(self, now: float) -> bool:
+        return self.open_until > now
+
+    def record_success(self, latency: Optional[float] = None):
+        self.success_rate += self.alpha * (1 - self.success_rate)
+        if latency is not None:
+            self.latency = latency if not self.latency else self.latency + self.alpha * (latency - self.latency)
+        self.consecutive_failures = 0
+        self.trips = 0
+
+    def record_failure(self, now: float) -> bool:
+        """Record a failure and return True if it tripped the circuit breaker."""
+        self.success_rate -= self.alpha * self.success_rate
+        self.consecutive_failures += 1
+        if self.consecutive_failures < self.failure_threshold:
+            return False
+        self.trips += 1
+        self.consecutive_failures = 0
+        self.open_until = now + min(self.max_cooldown, self.base_cooldown * 2 ** (self.trips - 1))
+        return True
+
+
+class SitePool:
+    """
+    The proxies currently usable for one site.
+
+    Members live in a list with a position index so adding, removing and
+    picking are all O(1). Proxies whose circuit is open wait in a heap ordered
+    by the end of their cooldown and rejoin the pool when it expires.
+    """
+
+    def __init__(self):
+        self.members: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.cooling: List[Tuple[float, str]] = []
+
+    def __len__(self):
+        return len(self.members)
+
+    def add(self, key: str):
+        if key not in self.positions:
+            self.positions[key] = len(self.members)
+            self.members.append(key)
+
+    def remove(self, key: str):
+        position = self.positions.pop(key, None)
+        if position is None:
+            return
+        last = self.members.pop()
+        if last != key:
+            self.members[position] = last
+            self.positions[last] = position
+
+    def cool_down(self, key: str, until: float):
+        self.remove(key)
+        heapq.heappush(self.cooling, (until, key))
+
+    def release_cooled(self, health: Dict[str, ProxyHealth], now: float):
+        while self.cooling and self.cooling[0][0] <= now:
+            _, key = heapq.heappop(self.cooling)
+            # A proxy that tripped again while cooling has a later entry in the heap
+            if not health[key].is_open(now):
+                self.add(key)
+
+    def next_release(self) -> Optional[float]:
+        """When the earliest cooldown ends, or None if no proxy is cooling down."""
+        return self.cooling[0][0] if self.cooling else None
+
+    def pick(self, health: Dict[str, ProxyHealth], now: float) -> Optional[str]:
+        """Pick the healthier of two random members, or None if the pool is empty."""
+        self.release_cooled(health, now)
+        if not self.members:
+            return None
+        first = random.choice(self.members)
+        second = random.choice(self.members)
+        return first if health[first].score >= health[second].score else second
@@ -1,14 +1,20 @@
+import asyncio
+import atexit
+import contextlib
 import json
 import os
-import random
-from typing import List, Optional, Callable
+import threading
+import time
+from typing import Dict, List, Optional, Callable
 
 from fake_useragent import UserAgent
 from playwright.async_api import async_playwright
 from pydantic import BaseModel
-from uszipcode import SearchEngine
 
-from utility.utils import Websites
+from scraping.proxies.health import ProxyHealth, SitePool
+from utility.files import write_atomic
+from utility.metrics import metrics
+from utility.utils import Websites, NoProxyAvailable, get_lat_long_from_zip
 
 
 class Proxy(BaseModel):
@@ -26,24 +32,64 @@ class Proxy(BaseModel):
     async def async_init(self):
         await self.check_all_sites()
 
-    async def check_all_sites(self):
-        for site in Websites:
-            await self.check_proxy(site)
+    async def probe(self, timeout: float = 5.0, target: str = 'www.google.com:443') -> bool:
+        """
+        Cheap liveness check: open a TCP connection to the proxy and ask it to
+        CONNECT to `target`. Only a 2xx reply counts as alive.
+        """
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(self.ip, self.port), timeout)
+            writer.write(f"CONNECT {target} HTTP/1.1\r\nHost: {target}\r\n\r\n".encode())
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), timeout)
+            parts = status_line.decode(errors='ignore').split()
+            return len(parts) >= 2 and parts[1].startswith('2')
+        except Exception:
+            return False
+        finally:
+            if writer:
+                writer.close()
+
+    def mark_dead(self):
+        self.sites = {site.site_name: False for site in Websites}
+        self.trigger_alert()
+
+    async def check_all_sites(self, browser=None, semaphore: Optional[asyncio.Semaphore] = None,
+                              timeout: float = 20.0):
+        """
+        Check every site through this proxy. With `browser`, each check runs in
+        its own proxied context on that shared browser; otherwise one browser is
+        launched for all of this proxy's checks.
+        """
+        if browser:
+            await asyncio.gather(*(self.check_proxy(site, browser, semaphore, timeout) for site in Websites))
+            return
 
-    async def check_proxy(self, site: Websites):
-        ua = UserAgent()
         async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True, proxy={'server': 'http://per-context'})
+            try:
+                await asyncio.gather(*(self.check_proxy(site, browser, semaphore, timeout) for site in Websites))
+            finally:
+                await browser.close()
+
+    async def check_proxy(self, site: Websites, browser, semaphore: Optional[asyncio.Semaphore] = None,
+                          timeout: float = 20.0):
+        ua = UserAgent()
+        async with semaphore or contextlib.nullcontext():
+            context = None
             try:
-                browser = await p.chromium.launch(proxy={'server': f'http://{self.ip}:{self.port}'}, headless=True)
-                context = await browser.new_context(user_agent=ua.chrome)
+                context = await browser.new_context(user_agent=ua.chrome,
+                                                    proxy={'server': f'http://{self.ip}:{self.port}'})
                 page = await context.new_page()
-                success = await self.load_page(page, site.base_url)
+                success = await asyncio.wait_for(self.load_page(page, site.base_url), timeout)
                 self.sites[site.site_name] = success
             except Exception as e:
                 self.sites[site.site_name] = False
                 self.trigger_alert()
             finally:
-                await browser.close()
+                if context:
+                    await context.close()
 
     async def load_page(self, page, url: str):
         try:
@@ -56,6 +102,10 @@ class Proxy(BaseModel):
             print(f"Error loading {url}: {e}")
             return False
 
+    @property
+    def key(self) -> str:
+        return f"{self.ip}:{self.port}"
+
     def trigger_alert(self):
         self.alert = True
         if self.alert_callback:
@@ -63,6 +113,9 @@ class Proxy(BaseModel):
 
 
 class ProxyManager:
+    # Status changes are written at most once per `save_interval` seconds
+    save_interval: float = 10.0
+    status_file: Optional[str] = "Play/proxies_status.json"  # None keeps statuses in memory only
 
     def __init__(self, alert_callback: Optional[Callable[[], None]] = None,
                  metrics_callback: Optional[Callable[[dict], None]] = None, **kwargs):
@@ -71,9 +124,42 @@ class ProxyManager:
         self.proxies_available: bool = False  # Variable to track proxy availability
         self.alert_callback = alert_callback
         self.metrics_callback = metrics_callback
+        # Per-site pools of usable proxies and the health of every (site, proxy) pair
+        self.site_pools: Dict[str, SitePool] = {}
+        self.health: Dict[str, Dict[str, ProxyHealth]] = {}
+        self.proxies_by_key: Dict[str, Proxy] = {}
+        self._pool_lock = threading.Lock()
+        # Number of proxies validated for each site, kept up to date as statuses change
+        self.working_counts: Dict[str, int] = {site.site_name: 0 for site in Websites}
+        self._save_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._last_save = 0.0
+        self.saves = 0
+        atexit.register(self.flush_proxies)
         # self.load_from_json()
 
-    async def refresh_proxy_list(self):
+    def rebuild_pools(self):
+        """Rebuild the per-site pools from the validation status of `self.proxies`."""
+        with self._pool_lock:
+            self.proxies_by_key = {proxy.key: proxy for proxy in self.proxies}
+            self.site_pools = {site.site_name: SitePool() for site in Websites}
+            self.health = {site.site_name: {} for site in Websites}
+            self.working_counts = {site.site_name: 0 for site in Websites}
+            for proxy in self.proxies:
+                for site in Websites:
+                    status = proxy.sites.get(site.site_name)
+                    if status is True:
+                        self.working_counts[site.site_name] += 1
+                    if status is False:
+                        continue
+                    # Unchecked proxies start with a lower score than validated ones
+                    self.health[site.site_name][proxy.key] = ProxyHealth(1.0 if status else 0.5)
+                    self.site_pools[site.site_name].add(proxy.key)
+
+    async def refresh_proxy_list(self, max_concurrency: int = 20, probe_concurrency: int = 100,
+                                 probe_timeout: float = 5.0, check_timeout: float = 20.0):
+        started = time.perf_counter()
         with open("Play/proxies.txt", 'r') as f:
             proxy_lines = f.readlines()
 
@@ -88,24 +174,80 @@ class ProxyManager:
             ip_port = line.strip()
             if ':' in ip_port:
                 ip, port = ip_port.split(':')
-                proxy = Proxy(
+                created_proxies.append(Proxy(
                     ip=ip,
                     port=int(port),
                     sites={site.site_name: None for site in Websites},
                     alert=False,
                     alert_callback=self.alert_callback
-                )
-                await proxy.async_init()
-                created_proxies.append(proxy)
+                ))
+
+        # Drop dead proxies with a CONNECT probe before doing any browser work
+        probe_semaphore = asyncio.Semaphore(probe_concurrency)
+
+        async def probe(proxy: Proxy) -> bool:
+            async with probe_semaphore:
+                return await proxy.probe(probe_timeout)
+
+        alive = await asyncio.gather(*(probe(proxy) for proxy in created_proxies))
+        survivors = [proxy for proxy, is_alive in zip(created_proxies, alive) if is_alive]
+        for proxy, is_alive in zip(created_proxies, alive):
+            if not is_alive:
+                proxy.mark_dead()
+        print(f"{len(survivors)}/{len(created_proxies)} proxies passed the probe "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        # Check the survivors against every site, in contexts on one shared browser
+        if survivors:
+            check_semaphore = asyncio.Semaphore(max_concurrency)
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True, proxy={'server': 'http://per-context'})
+                try:
+                    await asyncio.gather(*(proxy.check_all_sites(browser, check_semaphore, check_timeout)
+                                           for proxy in survivors))
+                finally:
+                    await browser.close()
 
         self.proxies = created_proxies  # Update proxies list
         self.proxies_available = bool(self.proxies)  # Update availability flag
-        self.save_proxies()
-
-    def save_proxies(self, filename="Play/proxies_status.json"):
-        with open(filename, 'w') as f:
-            json.dump([proxy.dict() for proxy in self.proxies], f, indent=4)
+        self.rebuild_pools()
         self.get_proxy_metrics()
+        self.flush_proxies(force=True)
+        print(f"Refreshed {len(created_proxies)} proxies in {time.perf_counter() - started:.1f}s")
+
+    def save_proxies(self):
+        """
+        Mark the proxy statuses as changed. The file is rewritten right away if
+        the last write is older than `save_interval`, otherwise once the
+        interval has passed, so bursts of failures cost a single write.
+        """
+        with self._save_lock:
+            self._dirty = True
+            if self._save_timer:
+                return
+            delay = max(0.0, self._last_save + self.save_interval - time.monotonic())
+            self._save_timer = threading.Timer(delay, self.flush_proxies)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush_proxies(self, force: bool = False):
+        """Write pending proxy status changes now, atomically replacing the status file."""
+        with self._save_lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty and not force:
+                return
+            if not self.status_file:
+                return
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+        try:
+            write_atomic(self.status_file, lambda f: json.dump(self.snapshot(), f))
+            self.saves += 1
+        except Exception as e:
+            print(f"Error saving proxies to {self.status_file}: {e}")
 
     def load_from_json(self,
                        filename: str = "/Users/theokoester/dev/projects/python/webscrapers/App/Play/proxies_status.json"):
@@ -114,29 +256,71 @@ class ProxyManager:
             return
         try:
             with open(filename, 'r') as f:
-                proxies = json.load(f)
-                proxy_models = [Proxy(**proxy) for proxy in proxies]
-                self.proxies = proxy_models
-                self.proxies_available = bool(self.proxies)  # Update availability flag
-                self.get_proxy_metrics()
+                self.load_snapshot(json.load(f))
         except Exception as e:
             print(f"Error loading proxies from {filename}: {e}")
 
+    def snapshot(self) -> List[dict]:
+        """The proxies and their site statuses as plain dicts, as saved to the status file."""
+        return [proxy.dict(exclude={'alert_callback'}) for proxy in self.proxies]
+
+    def load_snapshot(self, proxies: List[dict]):
+        self.proxies = [Proxy(**proxy) for proxy in proxies]
+        self.proxies_available = bool(self.proxies)  # Update availability flag
+        self.rebuild_pools()
+        self.get_proxy_metrics()
+
     def get_random_proxy(self, site: Websites) -> Optional[Proxy]:
+        """
+        Pick a healthy proxy for `site`, favouring higher success rates and lower
+        latency. Returns None when no proxies are configured and raises
+        NoProxyAvailable when proxies exist but none is usable for the site.
+        """
         # Skip proxy logic if proxies are unavailable
         if not self.proxies_available:
             return None
 
-        while True:
-            proxy = random.choice(self.proxies)
-            site_status = proxy.sites.get(site.site_name)
-            if site_status is not False:
-                return proxy
+        with self._pool_lock:
+            pool = self.site_pools.get(site.site_name)
+            key = pool.pick(self.health[site.site_name], time.time()) if pool is not None else None
+        if key is None:
+            raise NoProxyAvailable(f"No healthy proxy available for {site}.")
+        return self.proxies_by_key[key]
+
+    def seconds_until_available(self, site: Websites) -> Optional[float]:
+        """Seconds until the first proxy cooling down for `site` rejoins its pool, None if none is cooling."""
+        with self._pool_lock:
+            pool = self.site_pools.get(site.site_name)
+            release = pool.next_release() if pool is not None else None
+        return max(0.0, release - time.time()) if release is not None else None
+
+    def report_success(self, proxy: Optional[Proxy], site: Websites, latency: Optional[float] = None):
+        if proxy:
+            self.record_success(proxy.key, site.site_name, latency)
+
+    def report_failure(self, proxy: Optional[Proxy], site: Websites):
+        """Record a failure; repeated failures put the proxy on a cooldown for this site."""
+        if not proxy:
+            return
+        metrics.inc('proxy_failures_total', site=site.site_name)
+        self.record_failure(proxy.key, site.site_name)
+
+    def record_success(self, key: str, site_name: str, latency: Optional[float] = None):
+        with self._pool_lock:
+            health = self.health.get(site_name, {}).get(key)
+            if health:
+                health.record_success(latency)
+
+    def record_failure(self, key: str, site_name: str):
+        with self._pool_lock:
+            health = self.health.get(site_name, {}).get(key)
+            if health and health.record_failure(time.time()):
+                self.site_pools[site_name].cool_down(key, health.open_until)
+                print(f"Proxy {key} cooling down for {site_name} "
+                      f"for {health.open_until - time.time():.0f}s")
 
     async def set_geolocation_from_zip(self, context, zip_code: str):
-        search = SearchEngine()
-        zipcode = search.by_zipcode(zip_code)
-        latitude, longitude = zipcode.lat, zipcode.lng
+        latitude, longitude = get_lat_long_from_zip(zip_code)
 
         # Print latitude and longitude for debugging
         await context.set_geolocation({"latitude": latitude, "longitude": longitude})
@@ -148,12 +332,8 @@ class ProxyManager:
 
     def get_proxy_metrics(self):
         total_proxies = len(self.proxies)
-        site_metrics = {site.site_name: {'working': 0, 'total': total_proxies} for site in Websites}
-
-        for proxy in self.proxies:
-            for site_name, status in proxy.sites.items():
-                if status is True:
-                    site_metrics[site_name]['working'] += 1
+        site_metrics = {site_name: {'working': working, 'total': total_proxies}
+                        for site_name, working in self.working_counts.items()}
 
         if self.metrics_callback:
             self.metrics_callback({'total_proxies': total_proxies, 'site_metrics': site_metrics})
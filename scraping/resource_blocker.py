@@ -0,0 +1,109 @@
+from typing import Dict, Iterable
+from urllib.parse import urlsplit
+
+# Typical transfer sizes used to estimate what an aborted request would have cost
+ESTIMATED_BYTES = {
+    'image': 40_000,
+    'media': 500_000,
+    'font': 35_000,
+    'stylesheet': 30_000,
+    'script': 60_000,
+    'xhr': 5_000,
+    'fetch': 5_000,
+    'other': 10_000,
+}
+
+DEFAULT_BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font'}
+
+DEFAULT_BLOCKED_DOMAINS = [
+    'doubleclick.net',
+    'googlesyndication.com',
+    'googletagmanager.com',
+    'googletagservices.com',
+    'google-analytics.com',
+    'googleadservices.com',
+    'facebook.net',
+    'bat.bing.com',
+    'hotjar.com',
+    'adsrvr.org',
+    'criteo.com',
+    'criteo.net',
+    'taboola.com',
+    'outbrain.com',
+    'scorecardresearch.com',
+    'quantserve.com',
+    'amazon-adsystem.com',
+    'ct.pinterest.com',
+    'analytics.tiktok.com',
+    'sc-static.net',
+    'demdex.net',
+    'omtrdc.net',
+    'everesttech.net',
+    'contentsquare.net',
+    'quantummetric.com',
+    'branch.io',
+    'newrelic.com',
+    'nr-data.net',
+]
+
+
+class ResourceBlocker:
+    """
+    Playwright route handler that aborts requests the scrapers never use.
+
+    A request is aborted when its resource type or its domain is blocked,
+    unless its URL contains one of the allowed patterns. Counts of blocked
+    requests and an estimate of the bytes they would have transferred are kept
+    per resource type.
+    """
+
+    def __init__(self, blocked_resource_types: Iterable[str] = DEFAULT_BLOCKED_RESOURCE_TYPES,
+                 blocked_domains: Iterable[str] = DEFAULT_BLOCKED_DOMAINS,
+                 allowed_url_patterns: Iterable[str] = ()):
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.blocked_domains = tuple(blocked_domains)
+        self.allowed_url_patterns = tuple(allowed_url_patterns)
+
+        self.pages = 0
+        self.allowed_requests = 0
+        self.blocked_requests = 0
+        self.blocked_bytes = 0
+        self.blocked_by_type: Dict[str, int] = {}
+
+    def is_blocked_domain(self, url: str) -> bool:
+        host = urlsplit(url).hostname or ''
+        return any(host == domain or host.endswith('.' + domain) for domain in self.blocked_domains)
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if any(pattern in url for pattern in self.allowed_url_patterns):
+            return False
+        return resource_type in self.blocked_resource_types or self.is_blocked_domain(url)
+
+    async def handle_route(self, route):
+        request = route.request
+        resource_type = request.resource_type
+
+        if self.should_block(request.url, resource_type):
+            self.blocked_requests += 1
+            self.blocked_bytes += ESTIMATED_BYTES.get(resource_type, ESTIMATED_BYTES['other'])
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+            await route.abort()
+            return
+
+        if resource_type == 'document' and request.is_navigation_request():
+            self.pages += 1
+        self.allowed_requests += 1
+        # Fall back to routes registered before this one, e.g. HAR recording or replay
+        await route.fallback()
+
+    def get_stats(self) -> dict:
+        pages = self.pages or 1
+        return {
+            'pages': self.pages,
+            'allowed_requests': self.allowed_requests,
+            'blocked_requests': self.blocked_requests,
+            'blocked_by_type': dict(self.blocked_by_type),
+            'estimated_blocked_bytes': self.blocked_bytes,
+            'blocked_requests_per_page': self.blocked_requests / pages,
+            'estimated_blocked_bytes_per_page': self.blocked_bytes / pages,
+        }
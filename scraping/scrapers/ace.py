@@ -3,9 +3,9 @@ from typing import List
 
 from playwright.async_api import async_playwright
 
-from Play.base_scraper import BaseScraper
-from Play.proxies.proxies import ProxyManager
-from Utility.utils import Websites
+from scraping.base_scraper import BaseScraper
+from scraping.proxies.proxies import ProxyManager
+from utility.utils import Websites
 from model.item import Product
 
 
@@ -33,6 +33,7 @@ class AceScraper(BaseScraper):
 
                 # Create browser context and page
                 self.context = await self.browser.new_context()
+                await self.setup_context(self.context)
                 self.page = await self.context.new_page()
 
                 # Navigate to the target URL
@@ -104,8 +105,9 @@ class AceScraper(BaseScraper):
         return product_info
 
 
-# Example usage:
-proxy_manager = ProxyManager()  # You would need to implement or provide this
-site = Websites.ACE  # Assuming you have an enumeration or similar for websites
-scraper = AceScraper(proxy_manager, site)
-scraper.start()
+if __name__ == '__main__':
+    # Example usage:
+    proxy_manager = ProxyManager()  # You would need to implement or provide this
+    site = Websites.ACE  # Assuming you have an enumeration or similar for websites
+    scraper = AceScraper(proxy_manager, site)
+    scraper.start()
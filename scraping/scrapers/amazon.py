@@ -1,8 +1,10 @@
 import asyncio
 import base64
 import os
+import time
 import uuid
 from io import BytesIO
+from typing import Awaitable, Callable, Optional
 
 import pytesseract
 from PIL import Image
@@ -11,18 +13,42 @@ from playwright.async_api import async_playwright, BrowserContext
 
 from model.amazon import AmazonItem
 from scraping.base_scraper import BaseScraper
+from scraping.browser_pool import BrowserPool
 from scraping.proxies.proxies import ProxyManager
-from utility.utils import Websites, google_search
+from utility.images import estimate_image_tokens, shrink_image
+from utility.utils import Websites, google_search_client
 
 
 class AmazonScraper(BaseScraper):
+    # Product images are kept so the screenshot sent for matching still shows the item
+    allowed_url_patterns = ['media-amazon.com/images/I/']
+    # Product pages are visited once each, lighter pacing keeps enrichment ahead of the crawl
+    humanization = 'light'
+
+    # Regions holding the product image, title and price, tried in order
+    buy_box_selectors = ['#ppd', '#dp-container', '#centerCol']
+    screenshot_max_short_side: int = 768
+    screenshot_max_aspect_ratio: float = 2.0  # Taller full-page fallbacks are cropped, keeping the top
+    screenshot_max_bytes: int = 150_000
 
     def __init__(self, proxy_manager: ProxyManager, status_callback=None, product_callback=None):
         super().__init__(proxy_manager, Websites.AMAZON, status_callback, product_callback)
         self.context: BrowserContext = None
         self.browser = None
+        self.screenshot_stats = {'screenshots': 0, 'bytes_saved': 0, 'tokens_saved': 0}
         self.page = None
 
+    async def capture_buy_box(self, page) -> bytes:
+        """Screenshot the product details / buy box region, falling back to the full page."""
+        for selector in self.buy_box_selectors:
+            try:
+                region = page.locator(selector).first
+                if await region.count() and await region.is_visible():
+                    return await region.screenshot(timeout=10000)
+            except Exception as e:
+                print(f"Failed to capture {selector}: {e}")
+        return await page.screenshot(full_page=True, timeout=30000)
+
     async def take_screenshot(self, page, folder_path='screenshots', unique_id=None, attempts=3):
         # Create the folder if it doesn't exist
         os.makedirs(folder_path, exist_ok=True)
@@ -31,17 +57,25 @@ class AmazonScraper(BaseScraper):
         if unique_id is None:
             unique_id = str(uuid.uuid4())
 
-        file_path = os.path.join(folder_path, f'screenshot_{unique_id}.png')
+        file_path = os.path.join(folder_path, f'screenshot_{unique_id}.jpg')
 
         for attempt in range(attempts):
             try:
-                screenshot_buffer = await page.screenshot(full_page=True, timeout=30000)
+                screenshot_buffer = await self.capture_buy_box(page)
+                with Image.open(BytesIO(screenshot_buffer)) as original:
+                    original_size = original.size
+
+                # Shrink to a small JPEG before it is uploaded to the vision model
+                image_buffer, size = shrink_image(screenshot_buffer, self.screenshot_max_short_side,
+                                                  self.screenshot_max_bytes,
+                                                  max_aspect_ratio=self.screenshot_max_aspect_ratio)
+                self.record_screenshot_savings(len(screenshot_buffer), original_size, len(image_buffer), size)
 
                 # Save the screenshot buffer to a file
                 with open(file_path, 'wb') as f:
-                    f.write(screenshot_buffer)
+                    f.write(image_buffer)
 
-                base64_image = base64.b64encode(screenshot_buffer).decode('utf-8')
+                base64_image = base64.b64encode(image_buffer).decode('utf-8')
                 return base64_image, file_path
             except Exception as e:
                 if attempt < attempts - 1:
@@ -51,12 +85,32 @@ class AmazonScraper(BaseScraper):
                     print(f"Failed to take screenshot after {attempts} attempts.")
                     raise e
 
-    async def run(self, search_query):
+    def record_screenshot_savings(self, original_bytes, original_size, final_bytes, final_size):
+        tokens_saved = estimate_image_tokens(*original_size) - estimate_image_tokens(*final_size)
+        stats = self.screenshot_stats
+        stats['screenshots'] += 1
+        stats['bytes_saved'] += original_bytes - final_bytes
+        stats['tokens_saved'] += tokens_saved
+        print(f"Screenshot {original_size} {original_bytes} B -> {final_size} {final_bytes} B, "
+              f"~{tokens_saved} image tokens saved")
+
+    async def run(self, search_query, browser_pool: BrowserPool = None,
+                  proxy_factory: Optional[Callable[[], Awaitable]] = None):
+        """
+        Find the Amazon listing for `search_query` and read its price, or take a
+        screenshot when the price cannot be read. With `browser_pool` the page
+        opens on a pooled context instead of a new browser, behind the proxy
+        `proxy_factory` returns once the listing has been found.
+        """
         self.is_running = True
-        first_item_link = google_search(search_query)
+        first_item_link = await google_search_client.search(search_query)
         if not first_item_link:
             return None, None
 
+        if browser_pool:
+            proxy = await proxy_factory() if proxy_factory else None
+            return await self.run_pooled(first_item_link, browser_pool, proxy)
+
         ua = UserAgent()
         proxy = self.proxy_manager.get_random_proxy(self.site)  # Get proxy from ProxyManager
 
@@ -75,30 +129,11 @@ class AmazonScraper(BaseScraper):
 
                 # Set up browser context with user agent
                 self.context = await self.browser.new_context(user_agent=ua.chrome)
+                await self.setup_context(self.context)
 
                 # Create a new page and navigate to the first item link
                 self.page = await self.context.new_page()
-                await self.page.goto(first_item_link, wait_until='domcontentloaded')
-
-                # Attempt to extract the price
-                price = None
-                try:
-                    price_str = await self.extract_price()
-                    if price_str:
-                        price = float(price_str.replace(',', ''))  # Convert price string to float
-                except Exception as e:
-                    print(f"Failed to extract price: {e}")
-
-                # If price extraction fails, take a screenshot
-                image = None
-                if price is None:
-                    await self.slow_scroll()
-                    await self.random_sleep()
-                    image = await self.take_screenshot(self.page)
-
-                # Return the extracted information
-                item = AmazonItem(url=first_item_link, price=price)
-                return image, item
+                return await self.scrape_item_page(first_item_link)
 
         except Exception as e:
             print(f"An error occurred during setup or navigation: {e}")
@@ -107,6 +142,55 @@ class AmazonScraper(BaseScraper):
             # Clean up resources
             await self.cleanup()
 
+    async def run_pooled(self, first_item_link, browser_pool: BrowserPool, proxy=None):
+        lease = None
+        failed = False
+        started = time.perf_counter()
+        try:
+            lease = await browser_pool.acquire(proxy, context_setup=self.setup_context,
+                                               user_agent=UserAgent().chrome)
+            self.context = lease.context
+            self.page = await self.context.new_page()
+            self.page.on("load", lease.count_page)
+            result = await self.scrape_item_page(first_item_link)
+            self.proxy_manager.report_success(proxy, self.site, time.perf_counter() - started)
+            return result
+        except Exception as e:
+            print(f"An error occurred during setup or navigation: {e}")
+            failed = True
+            self.proxy_manager.report_failure(proxy, self.site)
+            return None, None
+        finally:
+            if lease:
+                await browser_pool.release(lease, failed=failed)
+            self.context = self.page = None
+
+    async def scrape_item_page(self, first_item_link):
+        self.humanization_seconds = 0.0
+        await self.page.goto(first_item_link, wait_until='domcontentloaded')
+
+        # Attempt to extract the price
+        price = None
+        try:
+            price_str = await self.extract_price()
+            if price_str:
+                price = float(price_str.replace(',', ''))  # Convert price string to float
+        except Exception as e:
+            print(f"Failed to extract price: {e}")
+
+        # If price extraction fails, take a screenshot
+        image = None
+        if price is None:
+            await self.slow_scroll()
+            await self.random_sleep()
+            image, _ = await self.take_screenshot(self.page)
+
+        # Return the extracted information
+        item = AmazonItem(url=first_item_link, price=price)
+        if self.humanization_seconds:
+            print(f"Spent {self.humanization_seconds:.1f}s humanizing on {first_item_link}")
+        return image, item
+
     async def extract_price(self):
         # List of selectors to try for extracting the price
         price_selectors = [
@@ -1,11 +1,16 @@
+import asyncio
+import copy
 import json
 import os
 import random
+import time
+from contextlib import asynccontextmanager
 from enum import Enum
 from pprint import pprint
-from typing import List, Dict
-from urllib.parse import urljoin
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
 
+import httpx
 from fake_useragent import UserAgent
 from playwright.async_api import async_playwright
 from pydantic import ValidationError
@@ -13,7 +18,14 @@ from pydantic import ValidationError
 from model.home_depot import HomeDepotItem
 from model.item import Product
 from scraping.base_scraper import BaseScraper
+from scraping.browser_pool import BrowserPool, BrowserLease
+from scraping.coverage import CoverageTracker
+from scraping.frontier import CrawlFrontier, DONE, LEASED
 from scraping.proxies.proxies import Websites, ProxyManager
+from scraping.scrapers.home_depot_search import SearchModelClient, SearchModelTemplate
+from utility.cache import TTLCache
+from utility.metrics import metrics
+from utility.utils import NoProxyAvailable
 
 
 class SortByOption(Enum):
@@ -38,7 +50,20 @@ class HomeDepotScraper(BaseScraper):
     zip_code: str = '33823'
     zip_code_changed: bool = False
     is_running: bool = True
+    max_pages_per_browser: int = 50
+    max_browsers: int = 8  # Open browsers across all proxies; idle ones are closed to stay under it
+    concurrency: int = 1
+    max_tasks_per_proxy: int = 2
+    page_concurrency: int = 3  # Listing pages fetched at once per task
+    frontier_path: str = 'frontier.db'
+    no_proxy_wait: float = 60.0  # Wait when no proxy is healthy and none is cooling down
+    max_round_backoff: float = 900.0  # Longest wait before reseeding after rounds that completed nothing
+    min_sort_pass_yield: float = 0.05  # Skip further sort passes once one adds fewer new items than this
+    fetch_mode: str = 'browser'  # 'browser' renders listing pages, 'http' replays searchModel directly
+    search_model_base_url: Optional[str] = None
     departments: List[Dict[str, str]] = []
+    allowed_url_patterns = ['searchModel']
+    store_session_ttl: float = 6 * 3600  # How long a captured store localization is reused
 
     zip_codes = ['33859', '33805', '33813', '34758', '34741', '34769', '32837', '33511', '33545']
     scrape_page_url = "https://www.homedepot.com/b/{department}/{specials}/N-{reference}"
@@ -51,8 +76,24 @@ class HomeDepotScraper(BaseScraper):
     ]
 
     def __init__(self, proxy_manager: ProxyManager, status_callback=None, product_callback=None,
-                 departments_file: str = 'departments.json'):
+                 departments_file: str = 'departments.json', store_sessions_file: str = 'store_sessions.json'):
         super().__init__(proxy_manager, Websites.HOME_DEPOT, status_callback, product_callback)
+        self.browser_pool: BrowserPool = None
+        self.frontier: CrawlFrontier = None
+        self.lease: Optional[BrowserLease] = None
+        self.coverage = CoverageTracker(self.min_sort_pass_yield)
+        self.coverage_key: Optional[tuple] = None  # (zip code, department, special) being scraped
+        self.proxy_slots: Dict[str, asyncio.Semaphore] = {}
+        self.crawl_stats: Dict[str, float] = {'tasks': 0, 'pages': 0, 'humanization_seconds': 0.0}
+        self.proxy = None  # Proxy of the current store session
+        # Captured searchModel template per zip code, and an HTTP client behind the template's proxy
+        self.search_templates: Dict[str, SearchModelTemplate] = {}
+        self.http_clients: Dict[str, httpx.AsyncClient] = {}
+        self.search_template_locks: Dict[str, asyncio.Lock] = {}
+        # Playwright storage state (cookies, local storage) of a context localized to a zip code behind a
+        # proxy, since the cookies only work from the proxy's IP, with the store the header showed
+        self.store_sessions = TTLCache(max_size=500, ttl=self.store_session_ttl, path=store_sessions_file)
+        self.localization_stats: Dict[str, float] = {'reused': 0, 'localized': 0, 'seconds': 0.0}
         self.departments = self.load_departments_from_json(departments_file)
         if not self.departments:
             print("No departments loaded from JSON file. Please ensure the file is correct and try again.")
@@ -77,92 +118,310 @@ class HomeDepotScraper(BaseScraper):
             await self.get_departments()
         random.shuffle(self.departments)
 
+        self.browser_pool = BrowserPool(max_pages_per_browser=self.max_pages_per_browser,
+                                        max_contexts_per_browser=self.max_tasks_per_proxy,
+                                        max_browsers=self.max_browsers, name=self.site.site_name)
+        if not self.frontier:
+            self.frontier = CrawlFrontier(self.frontier_path)
+        round_backoff = 0.0
         while self.is_running:
-            for zip_code in self.zip_codes:
-                print(f"Processing zip code: {zip_code}")
-                for department in self.departments:
-                    department_name = department['name'].replace(" ", "-")
-                    print(f"Processing department: {department_name} in zip code: {zip_code}")
-                    for special in self.specials:
-                        proxy = self.proxy_manager.get_random_proxy(self.site)
-                        ua = UserAgent()
-
-                        try:
-                            async with async_playwright() as p:
-                                # Launch browser with or without proxy
-                                if proxy:
-                                    print(f"Using proxy: {proxy.ip}:{proxy.port}")
-                                    self.browser = await p.chromium.launch(
-                                        proxy={'server': f'http://{proxy.ip}:{proxy.port}'},
-                                        headless=True
-                                    )
-                                else:
-                                    print("No proxy available, running without proxy.")
-                                    self.browser = await p.chromium.launch(headless=True)
-
-                                # Set up browser context and page
-                                screen_width, screen_height = 1920, 1080
-                                self.context = await self.browser.new_context(
-                                    user_agent=ua.chrome,
-                                    viewport={"width": screen_width, "height": screen_height}
-                                )
-                                self.page = await self.context.new_page()
-
-                                # Navigate to home site and handle scraping logic
-                                if proxy:
-                                    await self.go_to_home_site(proxy)
-                                else:
-                                    await self.page.goto(self.site.base_url)
-
-                                self.page.on("response", self.handle_response)
-                                await self.random_sleep()
-
-                                if zip_code:
-                                    await self.change_zip_code(zip_code)
-                                    self.zip_code_changed = False
-                                    await self.random_sleep()
-
-                                # Navigate to the department URL
-                                await self.navigate_to_category(department['href'])
-                                await self.random_sleep()
-
-                                # Extract the "/N-..." part of the URL
-                                current_url = self.page.url
-                                reference = current_url.split('/N-')[1]
-
-                                # Construct the URL for the discount category
-                                discount_url = self.scrape_page_url.format(
-                                    department=department_name,
-                                    specials=special,
-                                    reference=reference
-                                )
-                                await self.navigate_to_category(discount_url)
-                                await self.random_sleep()
-
-                                # Scrape products and check if all products are loaded
-                                await self.scrape_products()
-                                await self.random_sleep()
-
-                                # Close resources
-                                await self.close_page_and_browser()
-
-                        except Exception as e:
-                            print(f"An error occurred: {e}")
-                            await self.close_page_and_browser()
-
-                    print(f"Finished processing department: {department_name} for zip code: {zip_code}")
-                print(f"Finished processing zip code: {zip_code}")
+            # Seed every (zip code, department, special) task for this round, or resume the
+            # unfinished round of a previous run, and let `concurrency` workers drain it
+            round_id = self.frontier.start_round(
+                (zip_code, department, special)
+                for zip_code in self.zip_codes
+                for department in self.departments
+                for special in self.specials
+            )
+
+            self.crawl_stats = {'tasks': 0, 'pages': 0, 'humanization_seconds': 0.0}
+            self.coverage = CoverageTracker(self.min_sort_pass_yield)
+            self.proxy_slots = {}
+            self.search_template_locks = {}
+            done_before = self.frontier.counts(round_id).get(DONE, 0)
+            started = time.perf_counter()
+            await asyncio.gather(*(self.department_worker(round_id) for _ in range(max(1, self.concurrency))))
+
+            minutes = (time.perf_counter() - started) / 60
+            pages_per_minute = self.crawl_stats['pages'] / minutes if minutes else 0.0
+            print(f"Finished crawl round {round_id}: {self.frontier.counts(round_id)}, "
+                  f"{self.crawl_stats['tasks']} tasks this run, {self.crawl_stats['pages']} pages, "
+                  f"{pages_per_minute:.1f} pages/min with {self.concurrency} workers, "
+                  f"{self.crawl_stats['humanization_seconds']:.0f}s spent humanizing "
+                  f"({self.humanization_profile.name} profile)")
+            print(f"Browser pool metrics: {self.browser_pool.get_metrics()}")
+            print(f"Store localization: {self.localization_stats}")
+            print(f"Sort pass coverage: {self.coverage.get_stats()}")
+            self.print_blocking_stats()
+
+            # A round that completed nothing (e.g. every proxy failing) would otherwise be reseeded at once
+            counts = self.frontier.counts(round_id)
+            if counts.get(DONE, 0) > done_before:
+                round_backoff = 0.0
+            elif counts.get(LEASED, 0):
+                # Other worker processes are still finishing the round's last tasks
+                await self.wait_while_running(self.no_proxy_wait)
+            else:
+                round_backoff = min(self.max_round_backoff, round_backoff * 2 or self.no_proxy_wait)
+                print(f"Crawl round {round_id} completed no tasks, waiting {round_backoff:.0f}s before the next")
+                await self.wait_while_running(round_backoff)
+
+    async def wait_while_running(self, seconds: float):
+        deadline = time.monotonic() + seconds
+        while self.is_running and time.monotonic() < deadline:
+            await asyncio.sleep(min(1.0, deadline - time.monotonic()))
+
+    def fork(self) -> "HomeDepotScraper":
+        """
+        Return a worker copy of this scraper with its own page, context and browser
+        slots. Configuration, callbacks, the browser pool and crawl stats are shared.
+        """
+        worker = copy.copy(self)
+        worker.browser = worker.context = worker.page = worker.lease = worker.proxy = worker.coverage_key = None
+        return worker
+
+    async def department_worker(self, round_id: int):
+        worker = self.fork()
+        while self.is_running:
+            task = self.frontier.lease(round_id)
+            if task is None:
+                return
+            department_name = task.department['name'].replace(" ", "-")
+            print(f"Processing department: {department_name} in zip code: {task.zip_code}")
+            worker.humanization_seconds = 0.0
+            try:
+                if self.fetch_mode == 'http':
+                    completed = await worker.fetch_department(task.zip_code, task.department, task.special)
+                else:
+                    completed = await worker.scrape_department(task.zip_code, task.department, task.special)
+            except NoProxyAvailable as e:
+                # Not the task's fault: hand it back and wait for a proxy to come off its cooldown
+                self.frontier.release(task)
+                delay = self.proxy_manager.seconds_until_available(self.site)
+                delay = self.no_proxy_wait if delay is None else max(1.0, delay)
+                print(f"{e} Waiting {delay:.0f}s before the next task.")
+                await self.wait_while_running(delay)
+                continue
+
+            if completed:
+                self.frontier.complete(task)
+            elif not self.is_running:
+                self.frontier.release(task)
+            else:
+                self.frontier.fail(task)
+            self.crawl_stats['humanization_seconds'] += worker.humanization_seconds
+            print(f"Finished processing department: {department_name} for zip code: {task.zip_code}, "
+                  f"{worker.humanization_seconds:.1f}s humanizing")
+
+    async def acquire_proxy_slot(self):
+        """
+        Pick a proxy for the next task and wait for one of its `max_tasks_per_proxy`
+        slots. A few other proxies are tried first if the picked one is saturated.
+        """
+        proxy = self.proxy_manager.get_random_proxy(self.site)
+        if not proxy:
+            return None, None
+
+        for _ in range(3):
+            slot = self.proxy_slots.setdefault(BrowserPool.proxy_key(proxy),
+                                               asyncio.Semaphore(self.max_tasks_per_proxy))
+            if not slot.locked():
+                break
+            proxy = self.proxy_manager.get_random_proxy(self.site)
+
+        slot = self.proxy_slots.setdefault(BrowserPool.proxy_key(proxy),
+                                           asyncio.Semaphore(self.max_tasks_per_proxy))
+        await slot.acquire()
+        return proxy, slot
+
+    @asynccontextmanager
+    async def store_session(self, zip_code: str):
+        """
+        Open a page on a pooled context, land on the home site and localize it to
+        `zip_code`. The page is available as `self.page` inside the block.
+        """
+        proxy, slot = await self.acquire_proxy_slot()
+        self.proxy = proxy
+        ua = UserAgent()
+
+        if proxy:
+            print(f"Using proxy: {proxy.ip}:{proxy.port}")
+        else:
+            print("No proxy available, running without proxy.")
+
+        lease = None
+        failed = False
+        try:
+            # Check out a warm context for this proxy and zip code, launching a browser only on a
+            # pool miss. New contexts start from the cached store session of the proxy and zip code, if any.
+            session_key = f"{BrowserPool.proxy_key(proxy)}/{zip_code}"
+            session = self.store_sessions.get(session_key) if zip_code else None
+            lease = await self.browser_pool.acquire(
+                proxy,
+                context_setup=self.setup_context,
+                context_key=zip_code,
+                storage_state=session['storage_state'] if session else None,
+                user_agent=ua.chrome,
+                viewport=self.default_viewport
+            )
+            self.lease = lease
+            self.browser = lease.browser
+            self.context = lease.context
+            self.page = await self.context.new_page()
+            self.page.on("load", lease.count_page)
+
+            # Navigate to home site and handle scraping logic
+            if proxy:
+                await self.go_to_home_site(proxy)
+            else:
+                await self.page.goto(self.site.base_url)
+
+            self.page.on("response", self.handle_response)
+            await self.random_sleep()
+
+            # Warm contexts only come back to the pool tagged with a zip code once localized to it,
+            # and stored sessions are only captured from successful localizations
+            if zip_code and not await self.localize(zip_code, session_key, session):
+                # Scraping on would read another store's prices, and the context must not be pooled
+                raise RuntimeError(f"Could not localize to zip code {zip_code}")
+
+            yield lease
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if lease:
+                self.crawl_stats['pages'] += lease.pages
+                metrics.inc('pages_total', lease.pages, site=self.site.site_name)
+                await self.browser_pool.release(lease, failed=failed)
+            if slot:
+                slot.release()
+            self.browser = self.context = self.page = self.lease = self.proxy = None
+
+    async def scrape_department(self, zip_code: str, department: Dict[str, str], special: str) -> bool:
+        department_name = department['name'].replace(" ", "-")
+        self.coverage_key = (zip_code, department_name, special)
+        try:
+            async with self.store_session(zip_code):
+                # Navigate to the department URL
+                await self.navigate_to_category(department['href'])
+                await self.random_sleep()
+
+                # Extract the "/N-..." part of the URL
+                current_url = self.page.url
+                reference = current_url.split('/N-')[1]
+
+                # Construct the URL for the discount category
+                discount_url = self.scrape_page_url.format(
+                    department=department_name,
+                    specials=special,
+                    reference=reference
+                )
+                # The discount listing's first page is the first page of the default pass; the
+                # department listing before it belongs to no pass and is not counted
+                self.coverage.start_pass(self.coverage_key, 'DEFAULT')
+                await self.navigate_to_category(discount_url)
+                await self.random_sleep()
+
+                # Scrape products and check if all products are loaded
+                await self.scrape_products()
+                await self.random_sleep()
+            return True
+        except NoProxyAvailable:
+            raise
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            return False
+        finally:
+            self.coverage_key = None
+            self.crawl_stats['tasks'] += 1
+
+    async def capture_search_model_template(self, zip_code: str, department: Dict[str, str]) \
+            -> Optional[SearchModelTemplate]:
+        """
+        Load one department listing in a browser localized to `zip_code` and keep
+        the searchModel request it makes as the template for HTTP replay.
+        """
+        captured = asyncio.get_running_loop().create_future()
+
+        def on_request(request):
+            if "searchModel" in request.url and request.method == "POST" and not captured.done():
+                captured.set_result(request)
+
+        try:
+            async with self.store_session(zip_code):
+                self.page.on("request", on_request)
+                await self.navigate_to_category(department['href'])
+                request = await asyncio.wait_for(captured, timeout=30)
+                cookies = await self.context.cookies(request.url)
+                print(f"Captured searchModel template for zip code {zip_code}")
+                return SearchModelTemplate.from_request(request, cookies, proxy=self.proxy)
+        except NoProxyAvailable:
+            raise
+        except Exception as e:
+            print(f"Error capturing searchModel template for zip code {zip_code}: {e}")
+            return None
+
+    async def fetch_department(self, zip_code: str, department: Dict[str, str], special: str) -> bool:
+        """
+        HTTP-only counterpart of `scrape_department`: replays the store's searchModel
+        request for every sort option and page offset without rendering pages.
+        """
+        template = None
+        try:
+            async with self.search_template_locks.setdefault(zip_code, asyncio.Lock()):
+                if zip_code not in self.search_templates:
+                    template = await self.capture_search_model_template(zip_code, department)
+                    if not template:
+                        return False
+                    self.search_templates[zip_code] = template
+                    self.http_clients[zip_code] = template.http_client(
+                        timeout=15, limits=httpx.Limits(max_connections=self.concurrency * 4))
+
+            template = self.search_templates[zip_code]
+            client = SearchModelClient(template, self.http_clients[zip_code], base_url=self.search_model_base_url)
+            nav_param = client.nav_param_from_url(department['href'])
+            self.coverage_key = (zip_code, department['name'].replace(" ", "-"), special)
+            passes = [('DEFAULT', None)] + [(sort_option.name, sort_option.sort_url) for sort_option in SortByOption]
+            for index, (name, sort_url) in enumerate(passes):
+                if not self.coverage.should_continue(self.coverage_key, len(passes) - index):
+                    break
+                self.coverage.start_pass(self.coverage_key, name)
+                async for products in client.iter_pages(nav_param, sort_url):
+                    metrics.inc('search_model_responses_total')
+                    with metrics.timer('parse_response'):
+                        self.parse_data(products)
+            self.crawl_stats['pages'] += client.requests_made
+            metrics.inc('pages_total', client.requests_made, site=self.site.site_name)
+            self.proxy_manager.report_success(template.proxy, self.site)
+            return True
+        except NoProxyAvailable:
+            raise
+        except Exception as e:
+            print(f"An error occurred fetching {department['name']} for zip code {zip_code}: {e}")
+            if template and isinstance(e, httpx.HTTPError):
+                self.proxy_manager.report_failure(template.proxy, self.site)
+            # The captured session may have expired, capture a fresh one next time, unless
+            # another worker already did
+            if template and self.search_templates.get(zip_code) is template:
+                del self.search_templates[zip_code]
+                await self.http_clients.pop(zip_code).aclose()
+            return False
+        finally:
+            self.coverage_key = None
+            self.crawl_stats['tasks'] += 1
 
     async def get_departments(self):
         max_retries = 3
         retries = 0
         while retries < max_retries:
-            proxy = self.proxy_manager.get_random_proxy(Websites.HOME_DEPOT)
             try:
+                proxy = self.proxy_manager.get_random_proxy(Websites.HOME_DEPOT)
                 async with async_playwright() as p:
                     browser = await p.chromium.launch(proxy={'server': f'http://{proxy.ip}:{proxy.port}'},
                                                       headless=True)
                     context = await browser.new_context()
+                    await self.setup_context(context)
                     page = await context.new_page()
                     await page.goto("https://www.homedepot.com/")
 
@@ -224,65 +483,124 @@ class HomeDepotScraper(BaseScraper):
 
     async def scrape_products(self) -> None:
         try:
-            # Check if all products are loaded
-            await self.paginate_randomly()
-            for sort_option in SortByOption:
+            # The DEFAULT pass was started before the listing's first page loaded
+            with metrics.timer('pagination'):
+                await self.paginate_by_offset()
+            sort_options = list(SortByOption)
+            for index, sort_option in enumerate(sort_options):
+                if not self.coverage.should_continue(self.coverage_key, len(sort_options) - index):
+                    print(f"Skipping the remaining {len(sort_options) - index} sort passes, "
+                          f"the last one added almost no new items")
+                    break
                 print('Now sorting:', sort_option)
+                self.coverage.start_pass(self.coverage_key, sort_option.name)
                 await self.sort_by(sort_option)
                 await self.random_sleep()
-                await self.paginate_randomly()
+                with metrics.timer('pagination'):
+                    await self.paginate_by_offset()
                 await self.random_sleep()
 
         except Exception as e:
             print(f"An error occurred during scraping: {e}")
 
-    async def check_all_products_loaded(self) -> bool:
+    async def read_result_counts(self) -> Optional[Tuple[int, int, int]]:
+        """Read (first, last, total) from the "1-24 of 532 Results" counter of the current page."""
         try:
             element = await self.page.query_selector("div.results-pagination__counts")
-            if element:
-                text_content = await element.inner_text()
-                if "of" in text_content:
-                    total_products = int(text_content.split("of")[1].strip().split(" ")[0])
-                    current_range = text_content.split("of")[0].strip().split(" ")[-1]
-                    start, end = map(int, current_range.split("-"))
-                    if end == total_products:
-                        return True
-            else:
-                # If the element is not found, assume it's the last page
-                return True
-            return False
+            if not element:
+                return None
+            text_content = await element.inner_text()
+            if "of" not in text_content:
+                return None
+            total_products = int(text_content.split("of")[1].strip().split(" ")[0].replace(",", ""))
+            current_range = text_content.split("of")[0].strip().split(" ")[-1]
+            first, last = map(int, current_range.split("-"))
+            return first, last, total_products
         except Exception as e:
-            print(f"Error checking if all products are loaded: {e}")
-            return True  # Assume it's the last page if an error occurs
-
-    async def paginate_randomly(self):
-        pages_to_scrape = random.randint(5, 10)
-        current_page = 0
-        while current_page < pages_to_scrape:
-            try:
-                await self.page.wait_for_selector('a.hd-pagination__link[aria-label="Next"]', timeout=2000)
-                next_button = await self.page.query_selector('a.hd-pagination__link[aria-label="Next"]')
-
-                if next_button:
-                    await self.scroll_random_amount()
-                    await next_button.click()
-                    await self.page.wait_for_load_state('load')
-                    current_page += 1
-
-                    # Check if all products are loaded after pagination
-                    all_products_loaded = await self.check_all_products_loaded()
-                    if all_products_loaded:
-                        break
-
-                    await self.random_sleep()
-                else:
-                    print("Next button not found. Exiting loop.")
-                    break
-            except Exception as e:
-                print(f"Error navigating to the next page: {e}")
-                break
-
-    async def change_zip_code(self, zip_code):
+            print(f"Error reading result counts: {e}")
+            return None
+
+    @staticmethod
+    def offset_url(url: str, offset: int) -> str:
+        """Return `url` with its result offset (the Nao query parameter) set to `offset`."""
+        parts = urlsplit(url)
+        query = [(key, value) for key, value in parse_qsl(parts.query) if key != 'Nao']
+        query.append(('Nao', str(offset)))
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    async def paginate_by_offset(self):
+        """
+        Fetch every remaining page of the current listing. The total is read once
+        from the first page, then the other pages are loaded by offset, up to
+        `page_concurrency` at a time, in extra pages of the same context. Their
+        searchModel responses go through `handle_response` like the first page's.
+        """
+        counts = await self.read_result_counts()
+        if not counts:
+            return
+        first, last, total_products = counts
+        page_size = last - first + 1
+        if page_size <= 0 or last >= total_products:
+            return
+
+        base_url = self.page.url
+        semaphore = asyncio.Semaphore(self.page_concurrency)
+
+        async def fetch(offset: int):
+            async with semaphore:
+                if not self.is_running:
+                    return
+                page = await self.context.new_page()
+                try:
+                    if self.lease:
+                        page.on("load", self.lease.count_page)
+                    page.on("response", self.handle_response)
+                    await page.goto(self.offset_url(base_url, offset))
+                    await page.wait_for_load_state('load')
+                except Exception as e:
+                    print(f"Error loading results at offset {offset}: {e}")
+                finally:
+                    await page.close()
+
+        offsets = range(last, total_products, page_size)
+        print(f"Fetching {len(offsets)} more pages of {total_products} results")
+        await asyncio.gather(*(fetch(offset) for offset in offsets))
+
+    async def localize(self, zip_code: str, session_key: str, session: Optional[dict]) -> bool:
+        """
+        Localize the current context to `zip_code` through the store drawer, unless the
+        header already shows the store of the cached `session`. A successful drawer flow
+        is captured as storage state under `session_key` so later contexts can skip it.
+        Returns whether the context is localized.
+        """
+        stats = self.localization_stats
+        if session:
+            store = await self.current_store()
+            if store == session['store']:
+                stats['reused'] += 1
+                metrics.inc('store_session_cache_hits_total')
+                average = stats['seconds'] / stats['localized'] if stats['localized'] else 0.0
+                print(f"Reused store session for {zip_code}, saved ~{average:.1f}s "
+                      f"({stats['reused'] * average:.0f}s over {stats['reused']} tasks)")
+                return True
+            print(f"Store session for {zip_code} shows {store!r} instead of {session['store']!r}, localizing again")
+
+        started = time.perf_counter()
+        metrics.inc('store_session_cache_misses_total')
+        with metrics.timer('change_zip_code'):
+            localized = await self.change_zip_code(zip_code)
+        store = await self.current_store() if localized else None
+        if store:
+            self.store_sessions.put(session_key, {'storage_state': await self.context.storage_state(),
+                                                  'store': store})
+            self.store_sessions.save()
+        self.zip_code_changed = False
+        await self.random_sleep()
+        stats['localized'] += 1
+        stats['seconds'] += time.perf_counter() - started
+        return localized
+
+    async def change_zip_code(self, zip_code) -> bool:
         try:
             await self.page.get_by_role("button", name="Open drawer to view my store").click()
             await self.random_sleep(max_seconds=3, min_seconds=1)
@@ -295,8 +613,20 @@ class HomeDepotScraper(BaseScraper):
             await self.page.get_by_test_id("store-pod-localize__button").first.click()
             await self.random_sleep(max_seconds=3, min_seconds=1)
             print(f"Now scraping {zip_code}")
+            return True
         except Exception as e:
             print(f"Error changing ZIP code: {e}")
+            return False
+
+    async def current_store(self) -> Optional[str]:
+        """The store named in the page header, or None if it cannot be read."""
+        try:
+            text = await self.page.get_by_role("button", name="Open drawer to view my store").first.inner_text(
+                timeout=5000)
+        except Exception as e:
+            print(f"Error reading the store header: {e}")
+            return None
+        return " ".join(text.split()) or None
 
     def set_zip_code(self, new_zip_code):
         self.zip_code = new_zip_code
@@ -322,10 +652,11 @@ class HomeDepotScraper(BaseScraper):
                         return
 
                     body = await response.text()
-                    data = json.loads(body)
-
-                    products_data = data.get('data', {}).get('searchModel', {}).get('products', [])
-                    self.parse_data(products_data)
+                    metrics.inc('search_model_responses_total')
+                    with metrics.timer('parse_response'):
+                        data = json.loads(body)
+                        products_data = data.get('data', {}).get('searchModel', {}).get('products', [])
+                        self.parse_data(products_data)
                     break  # Exit loop if successful
                 except json.JSONDecodeError as e:
                     print(f"Error decoding JSON response from {url}: {e}")
@@ -337,37 +668,57 @@ class HomeDepotScraper(BaseScraper):
                     else:
                         print(f"Failed after {retries} attempts.")
 
+    @staticmethod
+    def read_raw_prices(item_data: dict):
+        """Read (current, original) price straight from a raw searchModel product."""
+        pricing = item_data.get('pricing') or {}
+        try:
+            current_price = float(pricing['value']) if pricing.get('value') is not None else None
+            original_price = float(pricing['original']) if pricing.get('original') is not None else None
+        except (TypeError, ValueError):
+            return None, None
+        return current_price, original_price
+
     def parse_data(self, data):
         if data:
+            metrics.inc('items_parsed_total', len(data), site=self.site.site_name)
             for item_data in data:
                 try:
-                    hd_product = HomeDepotItem(**item_data)
-                    current_price = hd_product.pricing.value if hd_product.pricing else None
-                    original_price = hd_product.pricing.original if hd_product.pricing else None
+                    is_new = self.coverage.record_item(self.coverage_key,
+                                                       (item_data.get('identifiers') or {}).get('itemId'))
+
+                    # Cheap pre-filter on the raw dict; only discounted items pay for full validation
+                    current_price, original_price = self.read_raw_prices(item_data)
 
                     if current_price is None or original_price is None:
                         print("Either current_price or original_price is None. Raw JSON data:")
                         pprint(item_data)
                         continue
 
-                    if current_price <= original_price * self.required_discount_percentage:
-                        product = Product(
-                            id=hd_product.identifiers.itemId,
-                            website=self.site,
-                            brand=hd_product.identifiers.brandName,
-                            name=hd_product.identifiers.productLabel,
-                            dollar_off=hd_product.pricing.promotion.dollarOff if hd_product.pricing and hd_product.pricing.promotion else 0,
-                            percentage_off=hd_product.pricing.promotion.percentageOff if hd_product.pricing and hd_product.pricing.promotion else 0,
-                            original_price=original_price,
-                            current_price=current_price,
-                            department=hd_product.info.categoryHierarchy[
-                                0] if hd_product.info.categoryHierarchy else None,
-                            url=urljoin(hd_product.website.base_url, hd_product.identifiers.canonicalUrl),
-                            image_url=urljoin(hd_product.website.base_url,
-                                              hd_product.media.images[0].url) if hd_product.media.images else ''
-                        )
-                        if self.product_callback:
-                            self.product_callback(product)
+                    if current_price > original_price * self.required_discount_percentage:
+                        continue
+                    metrics.inc('items_discounted_total', site=self.site.site_name)
+                    if is_new:
+                        self.coverage.record_deal(self.coverage_key)
+
+                    hd_product = HomeDepotItem(**item_data)
+                    product = Product(
+                        id=hd_product.identifiers.itemId,
+                        website=self.site,
+                        brand=hd_product.identifiers.brandName,
+                        name=hd_product.identifiers.productLabel,
+                        dollar_off=hd_product.pricing.promotion.dollarOff if hd_product.pricing and hd_product.pricing.promotion else 0,
+                        percentage_off=hd_product.pricing.promotion.percentageOff if hd_product.pricing and hd_product.pricing.promotion else 0,
+                        original_price=original_price,
+                        current_price=current_price,
+                        department=hd_product.info.categoryHierarchy[
+                            0] if hd_product.info.categoryHierarchy else None,
+                        url=urljoin(hd_product.website.base_url, hd_product.identifiers.canonicalUrl),
+                        image_url=urljoin(hd_product.website.base_url,
+                                          hd_product.media.images[0].url) if hd_product.media.images else ''
+                    )
+                    if self.product_callback:
+                        self.product_callback(product)
 
                 except ValidationError as e:
                     print(f"Error parsing Home Depot product data: {e}")
@@ -385,3 +736,11 @@ class HomeDepotScraper(BaseScraper):
                 await self.browser.close()
         except Exception as e:
             print(f"Error during closing page and browser: {e}")
+
+    async def cleanup(self):
+        for http_client in self.http_clients.values():
+            await http_client.aclose()
+        self.http_clients = {}
+        if self.browser_pool:
+            await self.browser_pool.close()
+            self.browser_pool = None
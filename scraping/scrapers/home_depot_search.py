@@ -0,0 +1,120 @@
+import copy
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+import httpx
+
+# Headers that describe the original connection rather than the request itself
+DROPPED_HEADERS = {'host', 'content-length', 'connection', 'accept-encoding', 'keep-alive',
+                   'transfer-encoding', 'upgrade'}
+
+# Maps the `sortby` query value used on listing pages to the searchModel orderBy field
+SORT_FIELDS = {
+    'mostpopular': 'BEST_MATCH',
+    'price': 'PRICE',
+    'toprated': 'TOP_RATED',
+    'topsellers': 'TOP_SELLERS',
+}
+
+
+class SearchModelTemplate:
+    """
+    A searchModel GraphQL request captured from a localized browser session,
+    along with the proxy the session ran behind. Its cookies are only valid
+    from that proxy's IP.
+    """
+
+    def __init__(self, url: str, headers: Dict[str, str], body: dict, proxy=None):
+        self.url = url
+        self.proxy = proxy
+        self.headers = {name: value for name, value in headers.items()
+                        if name.lower() not in DROPPED_HEADERS and not name.startswith(':')}
+        self.body = body
+
+    @classmethod
+    def from_request(cls, request, cookies: List[dict] = None, proxy=None) -> "SearchModelTemplate":
+        template = cls(request.url, request.headers, request.post_data_json or {}, proxy)
+        if cookies:
+            template.headers['cookie'] = '; '.join(f"{c['name']}={c['value']}" for c in cookies)
+        return template
+
+    def build_body(self, nav_param: str, start_index: int, page_size: int,
+                   order_by: Optional[Tuple[str, str]] = None) -> dict:
+        body = copy.deepcopy(self.body)
+        variables = body.setdefault('variables', {})
+        variables['navParam'] = nav_param
+        variables['startIndex'] = start_index
+        variables['pageSize'] = page_size
+        if order_by:
+            variables['orderBy'] = {'field': order_by[0], 'order': order_by[1]}
+        else:
+            variables.pop('orderBy', None)
+        return body
+
+    def http_client(self, **client_options) -> httpx.AsyncClient:
+        """An HTTP client that replays this template through the proxy it was captured behind."""
+        if self.proxy:
+            client_options['proxy'] = f"http://{self.proxy.ip}:{self.proxy.port}"
+        return httpx.AsyncClient(**client_options)
+
+
+class SearchModelClient:
+    """
+    Replays a captured searchModel request over plain HTTP, varying only the
+    department, sort order and page offset. `base_url` replaces the scheme and
+    host of the captured URL, which lets the client run against a local
+    stand-in server.
+    """
+
+    page_size: int = 24
+
+    def __init__(self, template: SearchModelTemplate, http_client: httpx.AsyncClient,
+                 base_url: Optional[str] = None):
+        self.template = template
+        self.http_client = http_client
+        self.url = self.rebase_url(template.url, base_url) if base_url else template.url
+        self.requests_made = 0
+
+    @staticmethod
+    def rebase_url(url: str, base_url: str) -> str:
+        base = urlsplit(base_url)
+        parts = urlsplit(url)
+        return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+    @staticmethod
+    def order_by_from_sort_url(sort_url: Optional[str]) -> Optional[Tuple[str, str]]:
+        if not sort_url:
+            return None
+        query = parse_qs(sort_url.lstrip('?'))
+        field = SORT_FIELDS.get(query.get('sortby', [''])[0])
+        if not field:
+            return None
+        return field, query.get('sortorder', ['asc'])[0].upper()
+
+    @staticmethod
+    def nav_param_from_url(url: str) -> str:
+        return url.split('/N-')[1].split('?')[0]
+
+    async def fetch_page(self, nav_param: str, start_index: int = 0, sort_url: Optional[str] = None) -> dict:
+        """Fetch one page of results and return the `searchModel` object."""
+        body = self.template.build_body(nav_param, start_index, self.page_size,
+                                        self.order_by_from_sort_url(sort_url))
+        response = await self.http_client.post(self.url, headers=self.template.headers, json=body)
+        self.requests_made += 1
+        response.raise_for_status()
+        return (response.json().get('data') or {}).get('searchModel') or {}
+
+    async def iter_pages(self, nav_param: str, sort_url: Optional[str] = None, max_pages: Optional[int] = None):
+        """Yield the product list of every page for a department, in offset order."""
+        start_index = 0
+        pages = 0
+        while True:
+            search_model = await self.fetch_page(nav_param, start_index, sort_url)
+            products = search_model.get('products') or []
+            yield products
+
+            pages += 1
+            total = (search_model.get('searchReport') or {}).get('totalProducts') or 0
+            start_index += self.page_size
+            if not products or start_index >= total or (max_pages and pages >= max_pages):
+                break
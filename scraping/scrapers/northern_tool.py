@@ -3,13 +3,15 @@ from typing import List
 from fake_useragent import UserAgent
 from playwright.async_api import async_playwright
 
-from Play.base_scraper import BaseScraper
-from Play.proxies.proxies import ProxyManager
-from Utility.utils import Websites
+from scraping.base_scraper import BaseScraper
+from scraping.proxies.proxies import ProxyManager
+from utility.utils import Websites
 from model.item import Product
 
 
 class NorthernToolScraper(BaseScraper):
+    allowed_url_patterns = ['productview/byCategory']
+
     async def run(self, **kwargs):
         async with async_playwright() as p:
             proxy = self.proxy_manager.get_random_proxy(self.site)  # Get proxy from ProxyManager
@@ -33,6 +35,7 @@ class NorthernToolScraper(BaseScraper):
                     user_agent=ua.chrome,
                     viewport={"width": screen_width, "height": screen_height}
                 )
+                await self.setup_context(self.context)
                 self.page = await self.context.new_page()
 
                 # Navigate to the target website
@@ -97,8 +100,9 @@ class NorthernToolScraper(BaseScraper):
         return product_info
 
 
-# Example usage:
-proxy_manager = ProxyManager()  # You would need to implement or provide this
-site = Websites.NORTHERN_TOOL  # Assuming you have an enumeration or similar for websites
-scraper = NorthernToolScraper(proxy_manager, site)
-scraper.start()
+if __name__ == '__main__':
+    # Example usage:
+    proxy_manager = ProxyManager()  # You would need to implement or provide this
+    site = Websites.NORTHERN_TOOL  # Assuming you have an enumeration or similar for websites
+    scraper = NorthernToolScraper(proxy_manager, site)
+    scraper.start()
@@ -1,8 +1,8 @@
 from playwright.async_api import async_playwright
 
-from Play.base_scraper import BaseScraper
-from Play.proxies.proxies import ProxyManager
-from Utility.utils import Websites
+from scraping.base_scraper import BaseScraper
+from scraping.proxies.proxies import ProxyManager
+from utility.utils import Websites
 
 
 class SamsClubScraper(BaseScraper):
@@ -18,6 +18,7 @@ class SamsClubScraper(BaseScraper):
                 headless=False)
 
             self.context = await self.browser.new_context(user_agent=self.USER_AGENTS[0])
+            await self.setup_context(self.context)
 
             self.page = await self.context.new_page()
 
@@ -37,8 +38,9 @@ class SamsClubScraper(BaseScraper):
         await self.browser.close()
 
 
-# Example usage:
-proxy_manager = ProxyManager()  # You would need to implement or provide this
-site = Websites.SAMS_CLUB  # Replace with your actual site enumeration or identifier
-scraper = SamsClubScraper(proxy_manager, site)
-scraper.start()
+if __name__ == '__main__':
+    # Example usage:
+    proxy_manager = ProxyManager()  # You would need to implement or provide this
+    site = Websites.SAMS_CLUB  # Replace with your actual site enumeration or identifier
+    scraper = SamsClubScraper(proxy_manager, site)
+    scraper.start()
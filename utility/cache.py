@@ -0,0 +1,130 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from utility.files import write_atomic
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    Values must be JSON serializable. When `path` is set the cache is loaded
+    from it on creation and written back atomically by `save()`, or by
+    `save_later()` at most once per `save_interval` seconds and at exit.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 7 * 24 * 3600, path: Optional[str] = None,
+                 save_interval: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.save_interval = save_interval
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if path:
+            self.load()
+            atexit.register(self.flush)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Error loading cache from {self.path}: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for key, expires_at, value in entries:
+                if expires_at >= now:
+                    self._entries[key] = (expires_at, value)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            write_atomic(self.path, lambda f: json.dump(self.entries(), f))
+        except Exception as e:
+            print(f"Error saving cache to {self.path}: {e}")
+
+    def entries(self) -> list:
+        """The entries as [key, expires_at, value] lists, as saved to `path`."""
+        with self._lock:
+            return [[key, expires_at, value] for key, (expires_at, value) in self._entries.items()]
+
+    def save_later(self):
+        """Mark the cache as changed; it is written once `save_interval` has passed, or by `flush()`."""
+        with self._save_lock:
+            self._dirty = True
+            if self._save_timer:
+                return
+            self._save_timer = threading.Timer(self.save_interval, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Write pending changes now."""
+        with self._save_lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+        self.save()
+
+    def get_metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
@@ -0,0 +1,30 @@
+import contextlib
+import os
+import tempfile
+import threading
+from typing import IO, Callable, Dict
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+def write_atomic(path: str, write: Callable[[IO], None], mode: str = 'w'):
+    """
+    Replace `path` with what `write` writes to the file it is given. The data goes
+    to a temporary file in the same directory that then replaces `path`, so readers
+    never see a partial file. Writers of the same path take turns and `write` runs
+    inside the turn, so a snapshot it takes never replaces a newer one.
+    """
+    path = os.path.abspath(path)
+    with _locks_lock:
+        lock = _locks.setdefault(path, threading.Lock())
+    with lock:
+        f = tempfile.NamedTemporaryFile(mode, dir=os.path.dirname(path), delete=False, suffix='.tmp')
+        try:
+            with f:
+                write(f)
+            os.replace(f.name, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(f.name)
+            raise
@@ -0,0 +1,51 @@
+import math
+from io import BytesIO
+from typing import Tuple
+
+from PIL import Image
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """
+    Estimate the input tokens of a high-detail image for OpenAI vision models.
+    The image is fit within 2048x2048, scaled so its short side is at most 768
+    and billed per 512px tile.
+    """
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def shrink_image(image_bytes: bytes, max_short_side: int = 768, max_bytes: int = 150_000,
+                 image_format: str = 'JPEG', min_quality: int = 40,
+                 max_aspect_ratio: float = 2.0) -> Tuple[bytes, Tuple[int, int]]:
+    """
+    Crop an image to at most `max_aspect_ratio` times as tall as it is wide,
+    keeping the top, downscale it so its short side is at most `max_short_side`
+    and re-encode it, lowering the quality and then the size until it fits in
+    `max_bytes`. Returns the encoded bytes and the final (width, height).
+
+    Limiting the short side matches what the vision model does itself, so a
+    tall full-page capture keeps text at a readable size instead of being
+    squeezed to fit its height.
+    """
+    image = Image.open(BytesIO(image_bytes)).convert('RGB')
+    max_height = int(image.width * max_aspect_ratio)
+    if image.height > max_height:
+        image = image.crop((0, 0, image.width, max_height))
+    scale = max_short_side / min(image.size)
+    if scale < 1:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                             Image.LANCZOS)
+
+    while True:
+        for quality in range(85, min_quality - 1, -15):
+            buffer = BytesIO()
+            image.save(buffer, format=image_format, quality=quality, optimize=True)
+            if buffer.tell() <= max_bytes:
+                return buffer.getvalue(), image.size
+        if min(image.size) <= 256:
+            return buffer.getvalue(), image.size
+        image = image.resize((int(image.width * 0.75), int(image.height * 0.75)), Image.LANCZOS)
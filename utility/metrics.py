@@ -0,0 +1,219 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utility.files import write_atomic
+
+# Upper bounds in seconds, from a fast parse to a slow page load or GPT call
+DEFAULT_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def label_key(name: str, labels: dict) -> LabelKey:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def format_labels(labels: Tuple[Tuple[str, str], ...], **extra) -> str:
+    pairs = list(labels) + [(key, str(value)) for key, value in extra.items()]
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile, the same estimate Prometheus makes."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and histograms for the scraping pipeline.
+
+    Everything is exported in the Prometheus text format, either written to a
+    file with `write_textfile()` or served over HTTP by `serve()`. Stage
+    durations are recorded into the `stage_seconds` histogram with `timer()`.
+    """
+
+    def __init__(self, namespace: str = 'webscraper'):
+        self.namespace = namespace
+        self.counters: Dict[LabelKey, float] = {}
+        self.gauges: Dict[LabelKey, float] = {}
+        self.gauge_functions: Dict[LabelKey, Callable[[], float]] = {}
+        self.histograms: Dict[LabelKey, Histogram] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = label_key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[label_key(name, labels)] = value
+
+    def register_gauge(self, name: str, function: Callable[[], float], **labels):
+        """Read the gauge from `function` whenever metrics are exported."""
+        with self._lock:
+            self.gauge_functions[label_key(name, labels)] = function
+
+    def observe(self, name: str, value: float, **labels):
+        key = label_key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def merge_histogram(self, name: str, buckets, counts: List[int], total: float, **labels):
+        """Add bucket counts observed elsewhere, e.g. in a worker process, to a histogram."""
+        key = label_key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(tuple(buckets))
+            histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+            histogram.count += sum(counts)
+            histogram.sum += total
+
+    @contextmanager
+    def timer(self, stage: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - started, stage=stage, **labels)
+
+    def _gauge_values(self) -> Dict[LabelKey, float]:
+        values = dict(self.gauges)
+        for key, function in self.gauge_functions.items():
+            try:
+                values[key] = function()
+            except Exception as e:
+                print(f"Error reading gauge {key[0]}: {e}")
+        return values
+
+    def render(self) -> str:
+        """The current metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = self._gauge_values()
+            histograms = {key: (list(h.buckets), list(h.counts), h.count, h.sum)
+                          for key, h in self.histograms.items()}
+
+        lines: List[str] = []
+        typed = set()
+
+        def declare(name: str, kind: str):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            name = f"{self.namespace}_{name}"
+            declare(name, 'counter')
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), value in sorted(gauges.items()):
+            name = f"{self.namespace}_{name}"
+            declare(name, 'gauge')
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), (buckets, counts, count, total) in sorted(histograms.items()):
+            name = f"{self.namespace}_{name}"
+            declare(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{format_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: str):
+        """Atomically write the metrics to `path`, e.g. for node_exporter's textfile collector."""
+        try:
+            write_atomic(path, lambda f: f.write(self.render()))
+        except Exception as e:
+            print(f"Error writing metrics to {path}: {e}")
+
+    def serve(self, port: int = 9108, host: str = '127.0.0.1'):
+        """Serve the metrics at http://host:port/metrics from a daemon thread."""
+        if self._server:
+            return
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True).start()
+        print(f"Serving metrics on http://{host}:{port}/metrics")
+
+    def snapshot(self) -> dict:
+        """Raw values by (name, labels), for merging into the registry of another process."""
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'gauges': self._gauge_values(),
+                'histograms': {key: (h.buckets, list(h.counts), h.count, h.sum)
+                               for key, h in self.histograms.items()},
+            }
+
+    def summary(self) -> dict:
+        """Totals per counter and gauge, and count/avg/p95 per stage, for display in the app."""
+        with self._lock:
+            counters: Dict[str, float] = {}
+            for (name, _), value in self.counters.items():
+                counters[name] = counters.get(name, 0) + value
+            gauges: Dict[str, float] = {}
+            for (name, _), value in self._gauge_values().items():
+                gauges[name] = gauges.get(name, 0) + value
+            merged: Dict[str, Histogram] = {}
+            for (name, labels), histogram in self.histograms.items():
+                if name != 'stage_seconds':
+                    continue
+                stage = merged.setdefault(dict(labels).get('stage', ''), Histogram(histogram.buckets))
+                stage.counts = [a + b for a, b in zip(stage.counts, histogram.counts)]
+                stage.count += histogram.count
+                stage.sum += histogram.sum
+        stages = {name: {'count': histogram.count,
+                         'avg': histogram.sum / histogram.count if histogram.count else 0.0,
+                         'p95': histogram.quantile(0.95)}
+                  for name, histogram in merged.items()}
+        return {'counters': counters, 'gauges': gauges, 'stages': stages}
+
+
+metrics = MetricsRegistry()
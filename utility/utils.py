@@ -1,12 +1,15 @@
+import asyncio
+import random
 import time
 from enum import Enum
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
+import httpx
 import requests
 from dotenv import load_dotenv
-from uszipcode import SearchEngine
 
 from config.config import Config
+from utility.zip_table import get_zip_table
 
 load_dotenv()
 
@@ -15,10 +18,16 @@ class ProxyError(Exception):
     pass
 
 
+class NoProxyAvailable(ProxyError):
+    """Proxies are configured but none is currently healthy for the requested site."""
+    pass
+
+
 def get_lat_long_from_zip(zip_code: str) -> Tuple[float, float]:
-    search = SearchEngine(simple_zipcode=True)
-    zipcode = search.by_zipcode(zip_code)
-    return zipcode.lat, zipcode.lng
+    coordinates = get_zip_table().lookup(zip_code)
+    if coordinates is None:
+        raise ValueError(f"No coordinates for ZIP code {zip_code}")
+    return coordinates
 
 
 class Websites(Enum):
@@ -84,6 +93,111 @@ def google_search(search_query, retries=5, backoff_factor=1, num_results=1):
     return None
 
 
+class GoogleSearchClient:
+    """
+    Async Google Custom Search client for use inside the scrapers' event loops.
+
+    Requests share one pooled connection per event loop, rate-limit backoff
+    uses `asyncio.sleep` so other coroutines keep running, and concurrent
+    searches for the same query share a single request.
+    """
+
+    url = 'https://www.googleapis.com/customsearch/v1'
+
+    def __init__(self, retries: int = 5, backoff_factor: float = 1, timeout: float = 10, max_connections: int = 10):
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.max_connections = max_connections
+
+        self._clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+
+        self.requests_made = 0
+        self.deduplicated = 0
+
+    def get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            # Drop clients of loops that have since been closed
+            self._clients = {l: c for l, c in self._clients.items() if not l.is_closed()}
+            client = httpx.AsyncClient(timeout=self.timeout,
+                                       limits=httpx.Limits(max_connections=self.max_connections))
+            self._clients[loop] = client
+        return client
+
+    async def search(self, search_query: str, num_results: int = 1) -> Optional[str]:
+        """Return the link of the first result for `search_query`, or None."""
+        key = (asyncio.get_running_loop(), search_query, num_results)
+        in_flight = self._in_flight.get(key)
+        if in_flight:
+            self.deduplicated += 1
+            return await asyncio.shield(in_flight)
+
+        task = asyncio.ensure_future(self._search(search_query, num_results))
+        self._in_flight[key] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._in_flight.pop(key, None)
+            else:
+                task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+    async def _search(self, search_query: str, num_results: int) -> Optional[str]:
+        search_engine = Config.SEARCH_ENGINE
+        google_api_key = Config.GOOGLE_API_KEY
+
+        if not search_engine or not google_api_key:
+            print("Environment variables for search engine or API key are not set.")
+            return None
+
+        params = {
+            'q': search_query,
+            'key': google_api_key,
+            'cx': search_engine,
+            'num': num_results
+        }
+
+        client = self.get_client()
+        for attempt in range(self.retries):
+            try:
+                self.requests_made += 1
+                response = await client.get(self.url, params=params)
+                if response.status_code == 429:  # Too Many Requests
+                    sleep_time = self.backoff_factor * (2 ** attempt) * random.uniform(0.5, 1.5)
+                    print(f"HTTP 429 error: Too Many Requests. Retrying in {sleep_time:.1f} seconds...")
+                    await asyncio.sleep(sleep_time)
+                    continue
+                response.raise_for_status()
+
+                # Extract the link of the first Amazon item, if available
+                items = response.json().get('items', [])
+                if items:
+                    return items[0]['link']
+                print("No items found.")
+                return None
+            except httpx.HTTPStatusError as http_err:
+                print(f"HTTP error occurred: {http_err}")
+                return None
+            except Exception as err:
+                print(f"An error occurred: {err}")
+                return None
+
+        print("Max retries exceeded.")
+        return None
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.pop(loop, None)
+        if client:
+            await client.aclose()
+
+
+google_search_client = GoogleSearchClient()
+
+
 if __name__ == "__main__":
     search_query = "utilitech cord storage reel and stand"
     amazon_link = google_search(search_query)
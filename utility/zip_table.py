@@ -0,0 +1,113 @@
+import threading
+from array import array
+from typing import Optional, Tuple
+
+from utility.files import write_atomic
+
+ZIP_CODE_COUNT = 100000
+
+
+class ZipTable:
+    """
+    Every five digit ZIP code and its coordinates in three flat arrays indexed
+    by the numeric ZIP code, so validation and lookup are a single array access.
+
+    The table is built once from the uszipcode database and cached in a small
+    binary file; later starts only read that file.
+    """
+
+    def __init__(self, valid: bytearray, lat: array, lng: array):
+        self.valid = valid
+        self.lat = lat
+        self.lng = lng
+
+    def __len__(self):
+        return len(self.valid) - self.valid.count(0)
+
+    @staticmethod
+    def index(zip_code: str) -> Optional[int]:
+        if len(zip_code) != 5 or not zip_code.isdigit():
+            return None
+        return int(zip_code)
+
+    def is_valid(self, zip_code: str) -> bool:
+        index = self.index(zip_code)
+        return index is not None and self.valid[index] > 0
+
+    def lookup(self, zip_code: str) -> Optional[Tuple[float, float]]:
+        """Return (lat, lng) for a ZIP code, or None if it is unknown or has no coordinates."""
+        index = self.index(zip_code)
+        if index is None or self.valid[index] != 2:
+            return None
+        return self.lat[index], self.lng[index]
+
+    @classmethod
+    def from_rows(cls, rows) -> 'ZipTable':
+        """Build a table from (zipcode, lat, lng) rows; 1 marks a known ZIP, 2 one with coordinates."""
+        valid = bytearray(ZIP_CODE_COUNT)
+        lat = array('f', bytes(4 * ZIP_CODE_COUNT))
+        lng = array('f', bytes(4 * ZIP_CODE_COUNT))
+        for zip_code, latitude, longitude in rows:
+            index = cls.index(zip_code)
+            if index is None:
+                continue
+            if latitude is None or longitude is None:
+                valid[index] = 1
+                continue
+            valid[index] = 2
+            lat[index] = latitude
+            lng[index] = longitude
+        return cls(valid, lat, lng)
+
+    @classmethod
+    def from_uszipcode(cls, search_engine=None) -> 'ZipTable':
+        from uszipcode import SearchEngine
+
+        search_engine = search_engine or SearchEngine()
+        zip_klass = search_engine.zip_klass
+        try:
+            rows = search_engine.ses.query(zip_klass.zipcode, zip_klass.lat, zip_klass.lng)
+            return cls.from_rows(rows)
+        finally:
+            search_engine.close()
+
+    @classmethod
+    def load(cls, path: str) -> 'ZipTable':
+        valid = bytearray(ZIP_CODE_COUNT)
+        lat, lng = array('f'), array('f')
+        with open(path, 'rb') as f:
+            if f.readinto(valid) != ZIP_CODE_COUNT:
+                raise ValueError(f"Truncated ZIP table {path}")
+            lat.fromfile(f, ZIP_CODE_COUNT)
+            lng.fromfile(f, ZIP_CODE_COUNT)
+        return cls(valid, lat, lng)
+
+    def save(self, path: str):
+        write_atomic(path, self.write_to, mode='wb')
+
+    def write_to(self, f):
+        f.write(self.valid)
+        self.lat.tofile(f)
+        self.lng.tofile(f)
+
+
+_zip_table: Optional[ZipTable] = None
+_zip_table_lock = threading.Lock()
+
+
+def get_zip_table(path: str = 'zip_table.bin') -> ZipTable:
+    """The process-wide ZIP table, loaded from `path` or built and cached there on first use."""
+    global _zip_table
+    if _zip_table is not None:
+        return _zip_table
+    with _zip_table_lock:
+        if _zip_table is None:
+            try:
+                _zip_table = ZipTable.load(path)
+            except Exception:
+                _zip_table = ZipTable.from_uszipcode()
+                try:
+                    _zip_table.save(path)
+                except Exception as e:
+                    print(f"Error caching ZIP table to {path}: {e}")
+    return _zip_table
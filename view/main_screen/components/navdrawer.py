@@ -17,6 +17,19 @@ class DrawerItem(MDNavigationDrawerItem):
 
 class NavigationDrawer(MDNavigationDrawer):
     metrics = DictProperty()
+    pipeline_metrics = DictProperty()
+    # (counter or gauge, icon, label) shown under the proxy metrics
+    pipeline_rows = [
+        ('pages_total', 'file-document-multiple', 'Pages'),
+        ('items_parsed_total', 'package-variant', 'Items parsed'),
+        ('items_discounted_total', 'sale', 'Discounted'),
+        ('proxy_failures_total', 'lan-disconnect', 'Proxy failures'),
+        ('amazon_cache_hits_total', 'cached', 'Amazon cache hits'),
+        ('amazon_queue_depth', 'tray-full', 'Amazon queue'),
+        ('open_browsers', 'web', 'Open browsers'),
+        ('workers_healthy', 'server', 'Healthy workers'),
+        ('worker_restarts_total', 'restart', 'Worker restarts'),
+    ]
     update_zip_code = ObjectProperty()
 
     def __init__(self, **kwargs):
@@ -30,3 +43,15 @@ class NavigationDrawer(MDNavigationDrawer):
             label_text = f"{site}"
             trailing_text = f"{info['working']}/{info['total']}"
             self.ids.metrics.add_widget(DrawerLabel(text=label_text, icon='store', trailing_text=trailing_text))
+
+    def on_pipeline_metrics(self, instance, value):
+        values = {**value.get('counters', {}), **value.get('gauges', {})}
+        self.ids.pipeline_metrics.clear_widgets()
+
+        for name, icon, label_text in self.pipeline_rows:
+            self.ids.pipeline_metrics.add_widget(
+                DrawerLabel(text=label_text, icon=icon, trailing_text=f"{values.get(name, 0):.0f}"))
+        for stage, info in sorted(value.get('stages', {}).items()):
+            trailing_text = f"{info['avg']:.2f}s avg, p95 {info['p95']:g}s"
+            self.ids.pipeline_metrics.add_widget(DrawerLabel(text=stage, icon='timer-outline',
+                                                             trailing_text=trailing_text))
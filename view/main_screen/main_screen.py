@@ -15,9 +15,17 @@ class MainScreenView(BaseScreenView):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self._metrics_event = None
 
     def on_enter(self):
         self.controller.proxy_manager.get_proxy_metrics()
+        if self._metrics_event is None:
+            self._metrics_event = Clock.schedule_interval(self.update_pipeline_metrics, 5)
+
+    def on_leave(self):
+        if self._metrics_event is not None:
+            self._metrics_event.cancel()
+            self._metrics_event = None
 
     def model_is_changed(self):
         """
@@ -96,3 +104,7 @@ class MainScreenView(BaseScreenView):
 
     def update_nav_drawer_metrics(self):
         self.ids.nav_drawer.metrics = self.model.proxy_metrics
+
+    def update_pipeline_metrics(self, *_):
+        if 'nav_drawer' in self.ids:
+            self.ids.nav_drawer.pipeline_metrics = self.controller.get_pipeline_metrics()